@@ -0,0 +1,174 @@
+from typing import Dict, Iterable, List, Tuple
+from array import array
+import csv
+import datetime
+import heapq
+import itertools
+import json
+
+from data_structures_project.base import Place
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the matrix falls back to arrays
+    np = None
+
+
+class OccupancyMatrix:
+    """
+    Dense place x night matrix of the slots booked at every place to stay.
+
+    Each row is a place and each column a night between first and last. With numpy the matrix is
+    a 2-d int32 array and every aggregation is a single vectorised operation. Without it each row
+    is an array('i') and columns are combined with zip, which keeps the work in C but is slower.
+    """
+
+    def __init__(self, places: Iterable[Place], first: datetime.date | None = None, last: datetime.date | None = None,
+                 use_numpy: bool | None = None) -> None:
+        """
+        Args:
+            places: The places to stay. Places without an avalability are skipped
+            first: The first night, by default the earliest booked night
+            last: The last night, by default the latest booked night
+            use_numpy: Use numpy, by default only if it is installed
+        """
+        self.places = [place for place in places if place.avalability]
+        if use_numpy and np is None:
+            raise ImportError("numpy is not installed")
+        self.numpy = np is not None if use_numpy is None else use_numpy
+
+        booked_nights = [date for place in self.places for date in place.bookings]
+        self.first = first or min(booked_nights, default=datetime.date.today())
+        self.last = last or max(booked_nights, default=self.first)
+        if self.last < self.first:
+            raise ValueError("The last night must not be before the first night")
+        self.nights = (self.last - self.first).days + 1
+        self.dates = [self.first + datetime.timedelta(days=night) for night in range(self.nights)]
+
+        first_day = self.first.toordinal()
+        capacities = [place.avalability for place in self.places]
+        if self.numpy:
+            self.capacities = np.array(capacities, dtype=np.int32)
+            self.booked = np.zeros((len(self.places), self.nights), dtype=np.int32)
+        else:
+            self.capacities = array('i', capacities)
+            self.booked = [array('i', bytes(4 * self.nights)) for _ in self.places]
+
+        for row, place in enumerate(self.places):
+            cells = self.booked[row]
+            for date, remaining in place.bookings.items():
+                night = date.toordinal() - first_day
+                if 0 <= night < self.nights:
+                    cells[night] = max(place.avalability - remaining, 0)
+
+    @property
+    def capacity(self) -> int:
+        """
+        The number of slots across every place on a single night
+        """
+        return int(sum(self.capacities))
+
+    def booked_per_night(self) -> List[int]:
+        """
+        Returns the slots booked across every place on each night
+        """
+        if self.numpy:
+            return self.booked.sum(axis=0).tolist()
+        if not self.booked:
+            return [0] * self.nights
+        return [sum(column) for column in zip(*self.booked)]
+
+    def occupancy_rate(self) -> List[float]:
+        """
+        Returns the fraction of every place's slots booked on each night
+        """
+        capacity = self.capacity
+        return [booked / capacity if capacity else 0.0 for booked in self.booked_per_night()]
+
+    def place_occupancy(self) -> Dict[str, float]:
+        """
+        Returns the fraction of each place's slots booked over every night
+        """
+        if self.numpy:
+            totals = self.booked.sum(axis=1).tolist()
+        else:
+            totals = [sum(row) for row in self.booked]
+        return {place.name: total / (place.avalability * self.nights) for place, total in zip(self.places, totals)}
+
+    def sold_out_per_night(self) -> List[int]:
+        """
+        Returns the number of places with no slots left on each night
+        """
+        if self.numpy:
+            return (self.booked >= self.capacities[:, None]).sum(axis=0).tolist()
+        if not self.booked:
+            return [0] * self.nights
+        full = (map(capacity.__le__, row) for capacity, row in zip(self.capacities, self.booked))
+        return [sum(column) for column in zip(*full)]
+
+    def sold_out_nights(self) -> Dict[str, int]:
+        """
+        Returns the number of nights each place has no slots left
+        """
+        if self.numpy:
+            counts = (self.booked >= self.capacities[:, None]).sum(axis=1).tolist()
+        else:
+            counts = [sum(map(capacity.__le__, row)) for capacity, row in zip(self.capacities, self.booked)]
+        return {place.name: count for place, count in zip(self.places, counts)}
+
+    def rolling(self, values: List[float], window: int) -> List[float]:
+        """
+        Returns the mean of each window of nights ending on every night from the window-th onwards
+
+        Args:
+            values: A value for each night, e.g. from occupancy_rate
+            window: The number of nights in each window
+        """
+        if window < 1:
+            raise ValueError("The window must be at least 1 night")
+        if self.numpy:
+            return (np.convolve(np.asarray(values, dtype=float), np.ones(window), mode="valid") / window).tolist()
+        totals = [0.0, *itertools.accumulate(values)]
+        return [(totals[end] - totals[end - window]) / window for end in range(window, len(totals))]
+
+    def top_dates(self, k: int = 10) -> List[Tuple[datetime.date, float]]:
+        """
+        Returns the k fullest nights and their occupancy rate, fullest first
+        """
+        return heapq.nlargest(k, zip(self.dates, self.occupancy_rate()), key=lambda item: item[1])
+
+    def summary(self, window: int = 7, k: int = 10) -> Dict:
+        """
+        Returns the headline figures, in a form that can be serialised as JSON
+        """
+        occupancy = self.occupancy_rate()
+        booked = self.booked_per_night()
+        return {
+            "first": self.first.isoformat(),
+            "last": self.last.isoformat(),
+            "places": len(self.places),
+            "capacity_per_night": self.capacity,
+            "booked": sum(booked),
+            "occupancy": sum(booked) / (self.capacity * self.nights) if self.capacity else 0.0,
+            "sold_out_place_nights": sum(self.sold_out_per_night()),
+            f"best_{window}_night_occupancy": max(self.rolling(occupancy, window), default=0.0),
+            "top_dates": [[date.isoformat(), rate] for date, rate in self.top_dates(k)],
+        }
+
+    def export_csv(self, file_path: str) -> None:
+        """
+        Writes the figures for each night to a CSV file
+        """
+        with open(file_path, "w", newline="") as f:
+            csvwriter = csv.writer(f)
+            csvwriter.writerow(["date", "booked", "capacity", "occupancy", "sold_out"])
+            csvwriter.writerows([date.strftime("%d-%m-%Y"), booked, self.capacity, round(rate, 4), sold_out]
+                                for date, booked, rate, sold_out in zip(self.dates, self.booked_per_night(),
+                                                                        self.occupancy_rate(), self.sold_out_per_night()))
+
+    def export_json(self, file_path: str, window: int = 7, k: int = 10) -> None:
+        """
+        Writes the summary to a JSON file
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.summary(window, k), f, indent=2)
@@ -0,0 +1,106 @@
+import datetime
+
+
+class _Node:
+    __slots__ = ("minimum", "pending", "left", "right")
+
+    def __init__(self, minimum: int) -> None:
+        self.minimum = minimum
+        self.pending = 0
+        self.left = None
+        self.right = None
+
+
+class AvailabilityTree:
+    """
+    Segment tree of the slots remaining on each night for a single place.
+
+    The tree covers every day between FIRST_DATE and LAST_DATE, but nodes are only created
+    for the ranges that have been booked, so an unbooked place costs a single node.
+    Booking a range of nights and finding the fewest slots left over a range are both O(log n).
+    """
+
+    FIRST_DATE = datetime.date(2000, 1, 1)
+    LAST_DATE = datetime.date(2199, 12, 31)
+    FIRST_DAY = FIRST_DATE.toordinal()
+    LAST_DAY = LAST_DATE.toordinal()
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.root = _Node(capacity)
+
+    def _children(self, node: _Node) -> None:
+        """
+        Creates the children of a node if needed and pushes any pending change down to them
+        """
+        if node.left is None:
+            # A node without children covers a range where every night has the same slots left
+            node.left = _Node(node.minimum)
+            node.right = _Node(node.minimum)
+        elif node.pending:
+            for child in (node.left, node.right):
+                child.minimum += node.pending
+                child.pending += node.pending
+        node.pending = 0
+
+    def _add(self, node: _Node, low: int, high: int, start: int, end: int, amount: int) -> None:
+        if end < low or high < start:
+            return
+        if start <= low and high <= end:
+            node.minimum += amount
+            node.pending += amount
+            return
+        self._children(node)
+        middle = (low + high) // 2
+        self._add(node.left, low, middle, start, end, amount)
+        self._add(node.right, middle + 1, high, start, end, amount)
+        node.minimum = min(node.left.minimum, node.right.minimum)
+
+    def _minimum(self, node: _Node, low: int, high: int, start: int, end: int) -> int:
+        if end < low or high < start:
+            return self.capacity
+        if (start <= low and high <= end) or node.left is None:
+            return node.minimum
+        self._children(node)
+        middle = (low + high) // 2
+        return min(self._minimum(node.left, low, middle, start, end),
+                   self._minimum(node.right, middle + 1, high, start, end))
+
+    @classmethod
+    def check_range(cls, start: datetime.date, nights: int) -> tuple:
+        """
+        Returns the first and last day of a stay
+
+        Raises:
+            ValueError: If the stay isn't within the bookable range
+        """
+        first = start.toordinal()
+        last = first + nights - 1
+        if nights < 1 or first < cls.FIRST_DAY or last > cls.LAST_DAY:
+            raise ValueError(f"{nights} nights from {start} is outside of the bookable range")
+        return first, last
+
+    def available(self, start: datetime.date, nights: int = 1) -> int:
+        """
+        Returns the fewest slots left on any night from start for the given number of nights
+        """
+        first, last = self.check_range(start, nights)
+        return self._minimum(self.root, self.FIRST_DAY, self.LAST_DAY, first, last)
+
+    def book(self, start: datetime.date, number: int, nights: int = 1) -> bool:
+        """
+        Books the same number of slots on every night of the stay.
+        Either every night is booked or, if any night is too full, none of them are
+        """
+        first, last = self.check_range(start, nights)
+        if self._minimum(self.root, self.FIRST_DAY, self.LAST_DAY, first, last) < number:
+            return False
+        self._add(self.root, self.FIRST_DAY, self.LAST_DAY, first, last, -number)
+        return True
+
+    def set(self, date: datetime.date, remaining: int) -> None:
+        """
+        Sets the slots remaining on a single night, used when loading bookings.csv
+        """
+        first, _ = self.check_range(date, 1)
+        self._add(self.root, self.FIRST_DAY, self.LAST_DAY, first, first, remaining - self.available(date))
@@ -1,5 +1,8 @@
-from typing import Literal, Dict
+from typing import Literal, Dict, Tuple
+from types import MappingProxyType
 from data_structures_project.utils import prompt_number, boyer_moore_search
+from data_structures_project.availability import AvailabilityTree
+from data_structures_project.enquiries import Enquiry, EnquiryQueue
 import datetime
 
 
@@ -8,6 +11,8 @@ class Address:
     Object to hold the address infomation of a place to stay
     """
 
+    __slots__ = ("number", "roadname", "postcode")
+
     def __init__(self, number: int = None, roadname: str = None, postcode: str = None) -> None:
         self.number = number
         self.roadname = roadname
@@ -15,6 +20,13 @@ class Address:
 
     def __str__(self) -> str:
         return f"{self.number} - {self.roadname} - {self.postcode}"
+
+    @classmethod
+    def from_string(cls, address: str) -> "Address":
+        """
+        Creates an address from the "number - roadname - postcode" format used in the CSV files
+        """
+        return cls(*map(str.strip, address.split("-")))
     
     def get(self):
         self.number = prompt_number(prompt="Please enter your street number: ")
@@ -22,33 +34,61 @@ class Address:
         self.postcode = input("Please enter your postcode: ").strip()
 
 
+class _OptionalContainer:
+    """
+    Exposes a container slot that is only allocated once something is added to it.
+    Until then reads get a shared, read-only empty container
+    """
+
+    def __init__(self, slot: str, empty) -> None:
+        self.slot = slot
+        self.empty = empty
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        return self.empty if value is None else value
+
+    def __set__(self, instance, value) -> None:
+        setattr(instance, self.slot, value or None)
+
+
 class Place:
     """
     Object to hold infomation about a place to stay
+
+    Most places have no routing, bookings or enquiries, so those containers are left
+    unallocated until the first add_neighbour, add_heuristic, book or add_enquiry call.
     """
 
+    __slots__ = ("name", "type", "address", "avalability", "location",
+                 "_neighbours", "_heuristics", "_bookings", "_enquiries", "_availability_tree")
+
+    neighbours = _OptionalContainer("_neighbours", MappingProxyType({}))
+    heuristics = _OptionalContainer("_heuristics", MappingProxyType({}))
+    # Stores the date as the key and the number of avaliable rooms
+    bookings = _OptionalContainer("_bookings", MappingProxyType({}))
+    enquiries = _OptionalContainer("_enquiries", ())
+
     def __init__(self, name: str, _type: Literal["Hotel", "Hostel", "BNB", "POI"], address: Address = None, avalability: int = None,
-                 neighbours: Dict[str, int] | None = None, heuristics: Dict[str, int] | None = None):
+                 neighbours: Dict[str, int] | None = None, heuristics: Dict[str, int] | None = None,
+                 location: Tuple[float, float] | None = None):
         self.name = name
         self.type = _type
         self.address = address
 
         self.avalability = avalability
+        # (x, y) coordinates, in the same units as the distances to neighbours
+        self.location = location
 
-        if neighbours is None:
-            self.neighbours = {}
-        else:
-            self.neighbours = neighbours
-
-        if heuristics is None:
-            self.heuristics = {}
-        else:
-            self.heuristics = heuristics
+        self.neighbours = neighbours
+        self.heuristics = heuristics
+        self._bookings = None
+        self._enquiries = None
 
-        # Stores the date as the key and the number of avaliable rooms
-        self.bookings = {}
-
-        self.enquiries = []
+        # Built from the bookings the first time availability is checked
+        self._availability_tree = None
 
     def __str__(self) -> str:
         return f"Name: {self.name} \nType: {self.type} \nAddress: {self.address}"
@@ -72,22 +112,121 @@ class Place:
     def __eq__(self, other):
         return self.name.lower() == other
 
+    def sort_key(self) -> tuple:
+        """
+        Key used to order places, by name, then type, then avalability
+        """
+        return self.name.casefold(), self.type.casefold(), self.avalability or 0
+
+    def add_neighbour(self, name: str, distance: int) -> None:
+        """
+        Adds a neighbouring place and the distance to it
+        """
+        if self._neighbours is None:
+            self._neighbours = {}
+        self._neighbours[name] = distance
+
+    def add_heuristic(self, name: str, distance: int) -> None:
+        """
+        Adds the straight-line distance to another place
+        """
+        if self._heuristics is None:
+            self._heuristics = {}
+        self._heuristics[name] = distance
+
+    def add_enquiry(self, enquiry: Enquiry) -> None:
+        """
+        Adds an enquiry for the staff of this place
+        """
+        if self._enquiries is None:
+            self._enquiries = EnquiryQueue()
+        self._enquiries.push(enquiry)
+
+    def remove_enquiry(self, enquiry_id: int | None = None) -> Enquiry:
+        """
+        Removes and returns an answered enquiry, by default the one to answer next
+
+        Raises:
+            KeyError: If there is no open enquiry with the id
+            IndexError: If no id is given and there are no open enquiries
+        """
+        if self._enquiries is None:
+            if enquiry_id is None:
+                raise IndexError("There are no open enquiries")
+            raise KeyError(enquiry_id)
+        if enquiry_id is None:
+            return self._enquiries.pop()
+        return self._enquiries.remove(enquiry_id)
+
     def __iter__(self):
         return iter([self.name, str(self.type), str(self.address), str(self.avalability)])
 
-    def book(self, date: datetime.datetime, number: int):
+    @property
+    def availability_tree(self) -> AvailabilityTree:
+        """
+        Segment tree of the slots remaining each night, for booking and checking ranges of nights
+        """
+        if self._availability_tree is None:
+            self._availability_tree = AvailabilityTree(self.avalability)
+            for date, remaining in self.bookings.items():
+                self._availability_tree.set(date, remaining)
+        return self._availability_tree
+
+    def set_remaining(self, date: datetime.date, remaining: int) -> None:
+        """
+        Sets the number of slots remaining on a date, used when loading bookings
         """
-        Books slots for the room, taking the date and number of slots as arguments
+        if self._bookings is None:
+            self._bookings = {}
+        self._bookings[date] = remaining
+        if self._availability_tree is not None:
+            self._availability_tree.set(date, remaining)
+
+    def load_bookings(self, bookings: Dict[datetime.date, int]) -> None:
         """
-        if date not in self.bookings.keys():
-            if number <= self.avalability:
-                self.bookings[date] = self.avalability - number
-                print(f"Successfully booked {number} slots on {date}!")
-            else:
-                print(f"Only {self.avalability} slots left! {number} is too many to book!")
+        Sets the slots remaining on many dates at once, used when loading bookings.csv
+        """
+        if self._bookings:
+            self._bookings.update(bookings)
+        else:
+            self._bookings = bookings
+        self._availability_tree = None
+
+    def available(self, date: datetime.date, nights: int = 1) -> int:
+        """
+        Returns the fewest slots left on any night of a stay
+        """
+        return self.availability_tree.available(date, nights)
+
+    def book(self, date: datetime.date, number: int, nights: int = 1, verbose: bool = True) -> bool:
+        """
+        Books slots for the room, taking the date, number of slots and number of nights as arguments.
+        Every night of the stay is booked, or none are if any night is too full.
+        The outcome is printed unless verbose is False. Returns True if the booking was made
+
+        Raises:
+            ValueError: If fewer than 1 slot is booked, or the stay isn't within the bookable range
+        """
+        if number < 1:
+            raise ValueError("At least 1 slot must be booked")
+        if self._availability_tree is None:
+            # Until availability is checked a booking only needs the nights it covers, so skip building the tree
+            AvailabilityTree.check_range(date, nights)
+            booked = min(self.bookings.get(date + datetime.timedelta(days=night), self.avalability)
+                         for night in range(nights)) >= number
         else:
-            if number > self.bookings[date]:
-                print(f"Only {self.bookings[date]} slots left! {number} is too many to book!")
-            else:
-                self.bookings[date] -= number
-                print(f"Successfully booked {number} slots on {date}!")
+            booked = self._availability_tree.book(date, number, nights)
+
+        if not booked:
+            if verbose:
+                print(f"Only {self.available(date, nights)} slots left! {number} is too many to book!")
+            return False
+
+        if self._bookings is None:
+            self._bookings = {}
+        for night in range(nights):
+            night_date = date + datetime.timedelta(days=night)
+            self._bookings[night_date] = self._bookings.get(night_date, self.avalability) - number
+        if verbose:
+            print(f"Successfully booked {number} slots on {date}" + (f" for {nights} nights!" if nights > 1 else "!"))
+        return True
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the data structures and algorithms used by the project.
+
+Each module can be run directly, e.g. python -m data_structures_project.benchmarks.routing
+"""
@@ -0,0 +1,73 @@
+from typing import Dict, List
+import argparse
+import datetime
+import threading
+import time
+
+from data_structures_project.base import Place
+from data_structures_project.booking import BookingEngine
+
+
+def stress(places: List[Place], threads: int, bookings_per_thread: int, nights: int = 1) -> Dict[str, float]:
+    """
+    Starts threads that all book one slot at a time, spreading them evenly over the places
+
+    Returns:
+        The number of bookings made and rejected, the bookings per second, and whether any place was overbooked
+    """
+    engine = BookingEngine()
+    date = datetime.date(2030, 1, 1)
+    made = [0] * threads
+    rejected = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int) -> None:
+        place = places[index % len(places)]
+        barrier.wait()
+        for _ in range(bookings_per_thread):
+            if engine.book(place, date, 1, nights=nights):
+                made[index] += 1
+            else:
+                rejected[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start_time = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    overbooked = any(remaining < 0 for place in places for remaining in place.bookings.values())
+    return {"made": sum(made), "rejected": sum(rejected), "bookings_per_second": (sum(made) + sum(rejected)) / elapsed,
+            "overbooked": overbooked}
+
+
+def benchmark_booking(threads: int = 2000, bookings_per_thread: int = 5, capacity: int = 5000,
+                      places: int = 100, nights: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Drives many threads at a single place, then the same threads spread over many places.
+    A place can never take more than its capacity, however many threads book it at once
+    """
+    single = [Place(name="Hotel", _type="Hotel", avalability=capacity)]
+    many = [Place(name=f"Hotel {index}", _type="Hotel", avalability=capacity) for index in range(places)]
+
+    results = {"one_place": stress(single, threads, bookings_per_thread, nights=nights),
+               "many_places": stress(many, threads, bookings_per_thread, nights=nights)}
+    assert results["one_place"]["made"] == min(capacity, threads * bookings_per_thread), "Bookings were lost"
+    assert not any(result["overbooked"] for result in results.values()), "A place was overbooked"
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress test concurrent bookings")
+    parser.add_argument("--threads", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=5, help="Bookings made by each thread")
+    parser.add_argument("--capacity", type=int, default=5000)
+    parser.add_argument("--places", type=int, default=100)
+    parser.add_argument("--nights", type=int, default=3)
+    args = parser.parse_args()
+
+    for layout, result in benchmark_booking(args.threads, args.bookings, args.capacity, args.places, args.nights).items():
+        print(f"{layout:>12}: {result['made']} made, {result['rejected']} rejected, "
+              f"{result['bookings_per_second']:.0f} bookings/s, overbooked: {result['overbooked']}")
@@ -0,0 +1,180 @@
+from typing import Dict, List, Tuple
+import csv
+import datetime
+import math
+import os
+import random
+
+from data_structures_project.base import Place, Address
+from data_structures_project.benchmarks.routing import grid_graph
+
+
+ROAD_NAMES = ["High Street", "Station Road", "Church Lane", "Park Avenue", "Mill Road", "Victoria Street",
+              "Queens Road", "Kings Way", "Bridge Street", "Castle Hill"]
+PLACE_WORDS = ["Grand", "Royal", "Harbour", "Meadow", "Riverside", "Oak", "Crown", "Lakeside", "Abbey", "Garden"]
+TYPES = ["Hotel", "Hostel", "BNB"]
+
+
+class Dataset:
+    """
+    A synthetic catalogue of places to stay, with bookings and a neighbour graph between the places.
+
+    Every place has a position, the neighbour graph weighs each edge at least the straight-line
+    distance between its ends, and heuristics are the straight-line distance rounded down,
+    so they are consistent for A*.
+    """
+
+    def __init__(self, places: List[Place], positions: Dict[str, Tuple[float, float]]) -> None:
+        self.places = places
+        self.positions = positions
+
+    @property
+    def graph(self) -> Dict[str, Dict[str, int]]:
+        return {place.name: dict(place.neighbours) for place in self.places}
+
+    def straight_line(self, start: str, end: str) -> int:
+        (start_x, start_y), (end_x, end_y) = self.positions[start], self.positions[end]
+        return math.floor(math.hypot(start_x - end_x, start_y - end_y))
+
+    def heuristics(self, end: str) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the heuristic values route_search needs for A* to a single end place
+        """
+        return {name: {end: self.straight_line(name, end)} for name in self.positions}
+
+    def write_csv(self, directory: str) -> None:
+        """
+        Writes the dataset to directory/csv in the format Session.load_csv reads.
+        Heuristics are only written to the places that already have them
+        """
+        os.makedirs(os.path.join(directory, "csv"), exist_ok=True)
+        tables = {
+            "places_to_stay.csv": (["name", "type", "address", "avalability"],
+                                   (list(place) for place in self.places)),
+            "bookings.csv": (["name", "date", "slots_remaining"],
+                             ([place.name, date.strftime("%d-%m-%Y"), remaining]
+                              for place in self.places for date, remaining in place.bookings.items())),
+            "neighbours.csv": (["name", "neighbour"],
+                               ([place.name, neighbour, distance]
+                                for place in self.places for neighbour, distance in place.neighbours.items())),
+            "heuristics.csv": (["starting_place", "ending_place", "distance"],
+                               ([place.name, ending_place, distance]
+                                for place in self.places for ending_place, distance in place.heuristics.items())),
+        }
+        for file_name, (header, rows) in tables.items():
+            with open(os.path.join(directory, "csv", file_name), "w", newline="") as f:
+                csvwriter = csv.writer(f)
+                csvwriter.writerow(header)
+                csvwriter.writerows(rows)
+
+
+def generate_places(count: int, rng: random.Random) -> List[Place]:
+    """
+    Creates places to stay with random names, types, addresses and avalability
+    """
+    return [Place(name=f"{rng.choice(PLACE_WORDS)} {rng.choice(TYPES)} {index}",
+                  _type=rng.choice(TYPES),
+                  address=Address(str(rng.randint(1, 300)), rng.choice(ROAD_NAMES),
+                                  f"{rng.choice('ABCDEFGHJK')}{rng.choice('LMNPRSTW')}{rng.randint(1, 99)} "
+                                  f"{rng.randint(1, 9)}{rng.choice('ABDEFGHJ')}{rng.choice('LNPQRSTU')}"),
+                  avalability=rng.randint(1, 50))
+            for index in range(count)]
+
+
+def generate_bookings(places: List[Place], count: int, rng: random.Random,
+                      first_date: datetime.date = datetime.date(2030, 1, 1), days: int = 365) -> int:
+    """
+    Books count random single slots at the places over a range of dates, skipping nights that are full
+
+    Returns:
+        The number of bookings made
+    """
+    made = 0
+    for _ in range(count):
+        place = rng.choice(places)
+        if place.book(first_date + datetime.timedelta(days=rng.randrange(days)), 1, verbose=False):
+            made += 1
+    return made
+
+
+def geometric_positions(count: int, rng: random.Random, side: float) -> List[Tuple[float, float]]:
+    return [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(count)]
+
+
+def connect_geometric(places: List[Place], positions: List[Tuple[float, float]], radius: float,
+                      rng: random.Random) -> None:
+    """
+    Connects every pair of places closer than radius, plus a chain through every place so the graph
+    is connected. Each edge weighs the straight-line distance rounded up, plus up to 20% detour
+    """
+    # Bucket the places into radius sized cells so only nearby places are compared
+    cells: Dict[Tuple[int, int], List[int]] = {}
+    for index, (x, y) in enumerate(positions):
+        cells.setdefault((int(x // radius), int(y // radius)), []).append(index)
+
+    def connect(first: int, second: int) -> None:
+        (x1, y1), (x2, y2) = positions[first], positions[second]
+        weight = math.ceil(math.hypot(x1 - x2, y1 - y2) * rng.uniform(1, 1.2))
+        places[first].add_neighbour(places[second].name, weight)
+        places[second].add_neighbour(places[first].name, weight)
+
+    for (cell_x, cell_y), members in cells.items():
+        for neighbour_cell in ((cell_x + dx, cell_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+            for first in members:
+                for second in cells.get(neighbour_cell, ()):
+                    if first < second and math.dist(positions[first], positions[second]) <= radius:
+                        connect(first, second)
+
+    for first, second in zip(range(len(places)), range(1, len(places))):
+        if places[second].name not in places[first].neighbours:
+            connect(first, second)
+
+
+def generate_dataset(places: int, bookings: int = 0, graph: str = "geometric", degree: float = 6,
+                     heuristic_targets: int = 10, seed: int | None = None) -> Dataset:
+    """
+    Generates a synthetic catalogue
+
+    Args:
+        places: The number of places to stay
+        bookings: The number of random single slot bookings to make
+        graph: "geometric" connects places closer than a radius, "grid" lays the places out on a square grid
+        degree: The average number of neighbours of each place in a geometric graph
+        heuristic_targets: The number of places every place stores a heuristic to
+        seed: Seed for the random generator
+
+    Returns:
+        The generated dataset
+    """
+    rng = random.Random(seed)
+    generated = generate_places(places, rng)
+
+    if graph == "grid":
+        width = math.ceil(math.sqrt(places))
+        grid, grid_positions = grid_graph(width, width, seed=seed)
+        # Grid edges weigh at least 10, so spacing the places 10 apart keeps the heuristics consistent
+        node_names = list(grid)[:places]
+        renamed = {node: place.name for node, place in zip(node_names, generated)}
+        for node, place in zip(node_names, generated):
+            for neighbour, weight in grid[node].items():
+                if neighbour in renamed:
+                    place.add_neighbour(renamed[neighbour], weight)
+        positions = {renamed[node]: (10 * grid_positions[node][0], 10 * grid_positions[node][1]) for node in node_names}
+    elif graph == "geometric":
+        side = 1000.0
+        point_list = geometric_positions(places, rng, side)
+        # Expected neighbours = density * pi * radius^2
+        radius = math.sqrt(degree * side * side / (math.pi * max(places, 1)))
+        connect_geometric(generated, point_list, radius, rng)
+        positions = {place.name: point for place, point in zip(generated, point_list)}
+    else:
+        raise ValueError(f"{graph} is not one of grid, geometric")
+
+    dataset = Dataset(generated, positions)
+    targets = rng.sample(generated, min(heuristic_targets, places))
+    for place in generated:
+        for target in targets:
+            place.add_heuristic(target.name, dataset.straight_line(place.name, target.name))
+
+    generate_bookings(generated, bookings, rng)
+    return dataset
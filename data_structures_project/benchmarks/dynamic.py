@@ -0,0 +1,80 @@
+from typing import Dict
+import argparse
+import random
+import time
+
+from data_structures_project.benchmarks.dataset import generate_dataset
+from data_structures_project.routing import RouteCache, shortest_path_tree
+from data_structures_project.spatial import KDTree
+
+
+def benchmark_dynamic(places: int = 5000, sources: int = 10, inserts: int = 50, edges: int = 3,
+                      seed: int = 0) -> Dict[str, float]:
+    """
+    Adds places one at a time to a geometric graph, each joined to its nearest places in both
+    directions, and keeps the shortest path trees from a set of tracked sources up to date,
+    first by repairing them and then by recomputing them from scratch
+
+    Args:
+        places: The number of places in the starting graph
+        sources: The number of tracked sources
+        inserts: The number of places to add
+        edges: The number of neighbours each added place is joined to
+        seed: Seed for the graph and the added places
+
+    Returns:
+        The average time to update every tracked tree after an insert, for each mode, in seconds
+    """
+    dataset = generate_dataset(places, graph="geometric", heuristic_targets=0, seed=seed)
+    rng = random.Random(seed)
+    locations = KDTree(dataset.positions.items())
+    tracked = rng.sample(list(dataset.positions), sources)
+
+    # The places to add and the edges joining each one to the graph
+    added = []
+    for index in range(inserts):
+        point = (rng.uniform(0, 1000), rng.uniform(0, 1000))
+        name = f"Added {index}"
+        neighbours = [(neighbour, int(distance) + 1) for distance, neighbour in locations.nearest(point, edges)]
+        added.append((name, neighbours))
+
+    cache = RouteCache(dataset.graph)
+    cache.track(tracked)
+    repaired = 0
+    start_time = time.perf_counter()
+    for name, neighbours in added:
+        for neighbour, weight in neighbours:
+            repaired += cache.add_edge(neighbour, name, weight)
+            repaired += cache.add_edge(name, neighbour, weight)
+    repair_time = time.perf_counter() - start_time
+
+    graph = dataset.graph
+    start_time = time.perf_counter()
+    for name, neighbours in added:
+        graph[name] = {}
+        for neighbour, weight in neighbours:
+            graph[neighbour][name] = weight
+            graph[name][neighbour] = weight
+        trees = {source: shortest_path_tree(graph, source) for source in tracked}
+    recompute_time = time.perf_counter() - start_time
+
+    for source in tracked:
+        assert cache.tracked[source][0] == trees[source][0], "Repaired distances differ from a full recompute"
+
+    return {"repair": repair_time / inserts, "recompute": recompute_time / inserts,
+            "nodes_repaired": repaired / inserts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare repairing tracked shortest path trees with recomputing them")
+    parser.add_argument("--places", type=int, default=5000)
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--inserts", type=int, default=50)
+    parser.add_argument("--edges", type=int, default=3, help="Neighbours of each added place")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = benchmark_dynamic(args.places, args.sources, args.inserts, args.edges, args.seed)
+    print(f"repair: {result['repair'] * 1000:.3f} ms/insert ({result['nodes_repaired']:.1f} nodes updated), "
+          f"recompute: {result['recompute'] * 1000:.3f} ms/insert, "
+          f"speedup: {result['recompute'] / result['repair']:.0f}x")
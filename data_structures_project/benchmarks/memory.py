@@ -0,0 +1,84 @@
+from typing import Callable, Dict, List
+import argparse
+import tracemalloc
+
+from data_structures_project.base import Place, Address
+from data_structures_project.store import PlaceStore
+
+
+class LegacyAddress:
+    """
+    Address as it was stored before __slots__, kept to compare against
+    """
+
+    def __init__(self, number=None, roadname=None, postcode=None) -> None:
+        self.number = number
+        self.roadname = roadname
+        self.postcode = postcode
+
+
+class LegacyPlace:
+    """
+    Place as it was stored before __slots__, with every container allocated up front
+    """
+
+    def __init__(self, name, _type, address=None, avalability=None) -> None:
+        self.name = name
+        self.type = _type
+        self.address = address
+        self.avalability = avalability
+        self.neighbours = {}
+        self.heuristics = {}
+        self.bookings = {}
+        self.enquiries = []
+
+
+def bytes_per_place(create: Callable[[int, List[str], List[str]], object], count: int) -> float:
+    """
+    Returns the memory allocated per place while creating count places
+    """
+    # The names and roads are created up front so only the place records themselves are measured
+    names = [f"Place {index}" for index in range(count)]
+    roads = [f"Road {index % 100}" for index in range(count)]
+
+    tracemalloc.start()
+    kept = create(count, names, roads)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return allocated / count
+
+
+def legacy_places(count: int, names: List[str], roads: List[str]) -> list:
+    return [LegacyPlace(names[index], "Hotel", LegacyAddress(index, roads[index], "AB1 2CD"), 10) for index in range(count)]
+
+
+def slotted_places(count: int, names: List[str], roads: List[str]) -> list:
+    return [Place(names[index], "Hotel", Address(index, roads[index], "AB1 2CD"), 10) for index in range(count)]
+
+
+def place_store(count: int, names: List[str], roads: List[str]) -> PlaceStore:
+    store = PlaceStore()
+    for index in range(count):
+        store.add(names[index], "Hotel", f"{index} - {roads[index]} - AB1 2CD", 10)
+    return store
+
+
+def benchmark_memory(count: int = 100000) -> Dict[str, float]:
+    """
+    Measures the bytes used per place by the old dict based classes, the slotted classes and a PlaceStore
+    """
+    return {
+        "legacy": bytes_per_place(legacy_places, count),
+        "slotted": bytes_per_place(slotted_places, count),
+        "place_store": bytes_per_place(place_store, count),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the memory used per place")
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    for layout, size in benchmark_memory(args.count).items():
+        print(f"{layout:>12}: {size:8.1f} bytes per place")
@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple
+import argparse
+import random
+import time
+
+from data_structures_project.metrics import metrics
+from data_structures_project.utils import route_search
+from data_structures_project.routing import Landmarks, CSRGraph
+
+
+def grid_graph(width: int, height: int, seed: int | None = None) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Tuple[int, int]]]:
+    """
+    Creates a symmetric grid graph where each edge weighs between 10 and 20
+
+    Returns:
+        The graph and the (x, y) position of every node
+    """
+    rng = random.Random(seed)
+    positions = {f"{x},{y}": (x, y) for x in range(width) for y in range(height)}
+    graph = {node: {} for node in positions}
+    for x in range(width):
+        for y in range(height):
+            for neighbor_x, neighbor_y in ((x + 1, y), (x, y + 1)):
+                if neighbor_x < width and neighbor_y < height:
+                    weight = rng.randint(10, 20)
+                    graph[f"{x},{y}"][f"{neighbor_x},{neighbor_y}"] = weight
+                    graph[f"{neighbor_x},{neighbor_y}"][f"{x},{y}"] = weight
+    return graph, positions
+
+
+def straight_line_heuristics(positions: Dict[str, Tuple[int, int]], end: str) -> Dict[str, Dict[str, int]]:
+    """
+    Creates the heuristic values route_search needs for A* to a single end node.
+    Every edge weighs at least 10, so 10 times the Manhattan distance is admissible
+    """
+    end_x, end_y = positions[end]
+    return {node: {end: 10 * (abs(x - end_x) + abs(y - end_y))} for node, (x, y) in positions.items()}
+
+
+def benchmark_routing(sizes: List[int], queries: int = 20, landmarks: int = 8, seed: int = 0) -> List[Dict[str, float]]:
+    """
+    Times dijkstra, A* with straight-line heuristics, ALT, dijkstra on a CSR graph, and bidirectional
+    dijkstra and ALT on square grid graphs
+
+    Args:
+        sizes: The width of each grid to test
+        queries: The number of random start/end pairs to time on each grid
+        landmarks: The number of landmarks to use for ALT
+        seed: Seed for the graph weights and queries
+
+    Returns:
+        A result for each grid size, with the average query time of each mode in seconds
+        and the average number of nodes each route_search mode expanded
+    """
+    results = []
+    rng = random.Random(seed)
+    for size in sizes:
+        graph, positions = grid_graph(size, size, seed=seed)
+        nodes = list(graph)
+        pairs = [tuple(rng.sample(nodes, 2)) for _ in range(queries)]
+
+        start_time = time.perf_counter()
+        alt = Landmarks(graph, count=landmarks, seed=seed)
+        preprocessing = time.perf_counter() - start_time
+
+        csr = CSRGraph(graph)
+
+        timings = {"dijkstra": 0.0, "a_star": 0.0, "alt": 0.0, "csr": 0.0, "bidirectional": 0.0,
+                   "bidirectional_alt": 0.0}
+        expanded = {mode: 0 for mode in timings if mode != "csr"}
+        metrics.enable()
+        for start, end in pairs:
+            heuristics = straight_line_heuristics(positions, end)
+
+            routes = {}
+            for mode, options in (("dijkstra", {}), ("a_star", {"a_star_heuristics": heuristics}),
+                                  ("alt", {"landmarks": alt}), ("bidirectional", {"bidirectional": True}),
+                                  ("bidirectional_alt", {"bidirectional": True, "landmarks": alt})):
+                metrics.reset()
+                start_time = time.perf_counter()
+                routes[mode] = route_search(graph, start, end, **options)
+                timings[mode] += time.perf_counter() - start_time
+                expanded[mode] += metrics.counters.get("route_search.nodes_expanded", 0)
+
+            start_time = time.perf_counter()
+            routes["csr"] = csr.route_search(start, end)
+            timings["csr"] += time.perf_counter() - start_time
+
+            assert len({distance for _, distance in routes.values()}) == 1, \
+                "Routing modes disagree on the shortest distance"
+        # The counts are only needed while benchmarking, and metrics slow every query down
+        metrics.disable()
+        metrics.reset()
+
+        results.append({"nodes": len(nodes), "alt_preprocessing": preprocessing,
+                        **{mode: total / queries for mode, total in timings.items()},
+                        "expanded": {mode: total / queries for mode, total in expanded.items()}})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare dijkstra, A*, ALT, CSR and bidirectional routing on grid graphs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--landmarks", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'dijkstra':>10} {'a_star':>10} {'alt':>10} {'csr':>10} {'bi':>10} {'bi alt':>10} {'alt prep':>10}")
+    for result in benchmark_routing(args.sizes, queries=args.queries, landmarks=args.landmarks):
+        print(f"{result['nodes']:>8} {result['dijkstra']:>10.4f} {result['a_star']:>10.4f} "
+              f"{result['alt']:>10.4f} {result['csr']:>10.4f} {result['bidirectional']:>10.4f} "
+              f"{result['bidirectional_alt']:>10.4f} {result['alt_preprocessing']:>10.4f}")
+        print(f"{'expanded':>8} {result['expanded']['dijkstra']:>10.0f} {result['expanded']['a_star']:>10.0f} "
+              f"{result['expanded']['alt']:>10.0f} {'':>10} {result['expanded']['bidirectional']:>10.0f} "
+              f"{result['expanded']['bidirectional_alt']:>10.0f}")
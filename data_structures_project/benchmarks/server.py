@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from data_structures_project.importer import BulkImporter
+from data_structures_project.main import Session
+from data_structures_project.server import Server
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, target: str,
+                  body: Dict | None = None) -> Tuple[int, object]:
+    """
+    Sends a request over a kept-alive connection and reads the JSON response
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                 + payload)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+async def client(port: int, requests: int, workload: List[Tuple[str, str, Dict | None]],
+                 latencies: List[float], seed: int) -> None:
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for _ in range(requests):
+            method, target, body = rng.choice(workload)
+            start_time = time.perf_counter()
+            status, _ = await request(reader, writer, method, target, body)
+            latencies.append(time.perf_counter() - start_time)
+            assert status < 500, f"{method} {target} failed with {status}"
+    finally:
+        writer.close()
+
+
+async def load_test(session: Session, clients: int, requests: int, seed: int) -> Dict[str, float]:
+    """
+    Runs concurrent clients making a mix of searches, routes, availability checks, bookings and enquiries
+    """
+    rng = random.Random(seed)
+    names = [place.name for place in session.places]
+    routable = [place.name for place in [*session.places, *session.poi] if place.neighbours]
+    workload = []
+    for _ in range(100):
+        name = rng.choice(names)
+        workload += [
+            ("GET", f"/search?q={name[:4].replace(' ', '+')}", None),
+            ("GET", f"/route?start={rng.choice(routable).replace(' ', '+')}"
+                    f"&end={rng.choice(routable).replace(' ', '+')}", None),
+            ("GET", "/available?date=01-01-2030&nights=2&party=1", None),
+            ("POST", "/bookings", {"name": name, "date": f"{rng.randint(1, 28):02}-01-2030", "number": 1, "nights": 2}),
+            ("POST", "/enquiries", {"name": name, "enquiry": "Is there parking?"}),
+        ]
+
+    server = Server(session)
+    http_server = await server.start(port=0)
+    port = http_server.sockets[0].getsockname()[1]
+    latencies: List[float] = []
+    try:
+        start_time = time.perf_counter()
+        await asyncio.gather(*(client(port, requests, workload, latencies, seed + index) for index in range(clients)))
+        elapsed = time.perf_counter() - start_time
+    finally:
+        http_server.close()
+        await http_server.wait_closed()
+        server.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {"requests": len(latencies), "requests_per_second": len(latencies) / elapsed,
+            "p50_ms": quantiles[49] * 1000, "p99_ms": quantiles[98] * 1000}
+
+
+def benchmark_server(places: int = 1000, clients: int = 50, requests: int = 200, seed: int = 0) -> Dict[str, float]:
+    """
+    Serves a copy of the CSV files with extra generated places, so the real files are left untouched
+    """
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copytree(os.path.join(working_directory, "csv"), os.path.join(directory, "csv"))
+        os.chdir(directory)
+        try:
+            session = Session()
+            BulkImporter(session).run({"name": f"Generated {index}", "type": "Hotel",
+                                       "address": f"{index} - Generated Road - GE{index % 99} 1AB",
+                                       "avalability": 50} for index in range(places))
+            return asyncio.run(load_test(session, clients, requests, seed))
+        finally:
+            os.chdir(working_directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the HTTP server")
+    parser.add_argument("--places", type=int, default=1000, help="Generated places added to the CSV data")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent kept-alive connections")
+    parser.add_argument("--requests", type=int, default=200, help="Requests made by each client")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = benchmark_server(args.places, args.clients, args.requests, args.seed)
+    print(f"{result['requests']} requests, {result['requests_per_second']:.0f} requests/s, "
+          f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
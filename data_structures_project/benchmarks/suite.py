@@ -0,0 +1,111 @@
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from data_structures_project.analytics import OccupancyMatrix
+from data_structures_project.base import Place
+from data_structures_project.benchmarks.dataset import generate_dataset
+from data_structures_project.main import Session
+from data_structures_project.spatial import KDTree
+from data_structures_project.utils import quick_sort, boyer_moore_search, route_search
+
+
+def best_time(function: Callable[[], object], repeats: int) -> float:
+    """
+    Returns the fastest of repeats runs in seconds, which is the least affected by other processes
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def benchmark_size(places: int, bookings: int, graph: str, queries: int, repeats: int, seed: int) -> Dict[str, float]:
+    """
+    Times each hot path on a dataset of the given size
+
+    Returns:
+        The time taken by each hot path in seconds
+    """
+    dataset = generate_dataset(places, bookings=bookings, graph=graph, seed=seed)
+    rng = random.Random(seed)
+    results = {}
+
+    results["quick_sort"] = best_time(lambda: quick_sort(list(dataset.places), key=Place.sort_key), repeats)
+
+    texts = [f"{place.name} {place.address} {place.type}".lower() for place in dataset.places]
+    patterns = [rng.choice(texts)[:6] for _ in range(queries)]
+    results["boyer_moore_search"] = best_time(
+        lambda: [boyer_moore_search(text, pattern) for pattern in patterns for text in texts], repeats) / queries
+
+    graph_dict = dataset.graph
+    names = list(graph_dict)
+    pairs = [tuple(rng.sample(names, 2)) for _ in range(queries)]
+    heuristics = {end: dataset.heuristics(end) for _, end in pairs}
+    results["route_search"] = best_time(
+        lambda: [route_search(graph_dict, start, end) for start, end in pairs], repeats) / queries
+    results["route_search_a_star"] = best_time(
+        lambda: [route_search(graph_dict, start, end, a_star_heuristics=heuristics[end]) for start, end in pairs],
+        repeats) / queries
+    locations = KDTree(dataset.positions.items())
+    results["route_search_locations"] = best_time(
+        lambda: [route_search(graph_dict, start, end, locations=locations) for start, end in pairs], repeats) / queries
+
+    matrix = OccupancyMatrix(dataset.places)
+    results["occupancy_matrix"] = best_time(lambda: OccupancyMatrix(dataset.places), repeats)
+    results["occupancy_summary"] = best_time(matrix.summary, repeats)
+
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        dataset.write_csv(directory)
+        os.chdir(directory)
+        try:
+            results["load_csv"] = best_time(Session, repeats)
+            session = Session()
+            # Every table is marked as changed, so the full rewrite is timed
+            results["update_csv"] = best_time(lambda: (session.mark_dirty(), session.update_csv()), repeats)
+        finally:
+            os.chdir(working_directory)
+    return results
+
+
+def run_suite(sizes: List[int], bookings_per_place: int = 5, graph: str = "geometric", queries: int = 10,
+              repeats: int = 3, seed: int = 0) -> Dict:
+    """
+    Runs the benchmarks over scaling dataset sizes
+
+    Returns:
+        JSON serialisable results, with the environment they were measured in
+    """
+    results = []
+    for size in sizes:
+        timings = benchmark_size(size, size * bookings_per_place, graph, queries, repeats, seed)
+        results.append({"places": size, "bookings": size * bookings_per_place, "graph": graph, "seconds": timings})
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "seed": seed, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot paths on synthetic datasets and print the results as JSON")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--bookings", type=int, default=5, help="Bookings per place")
+    parser.add_argument("--graph", choices=["geometric", "grid"], default="geometric")
+    parser.add_argument("--queries", type=int, default=10, help="Searches and routes timed on each dataset")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this file instead of printing them")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.bookings, args.graph, args.queries, args.repeats, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
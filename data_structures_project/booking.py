@@ -0,0 +1,103 @@
+from typing import Callable, Dict, Iterator
+from contextlib import contextmanager
+import datetime
+import threading
+
+from data_structures_project.base import Place
+
+
+class BookingEngine:
+    """
+    Makes bookings safe to take from many threads at once.
+
+    Each place has its own lock, so bookings at different places never wait on each other,
+    while bookings at the same place are serialised and can never overbook it. A multi-night
+    booking holds the place's lock for the whole stay, so it is all-or-nothing.
+
+    Bookings hold the engine's lock shared, and work that needs every place to stay still
+    (like writing the CSV files) can hold it exclusively.
+    """
+
+    def __init__(self) -> None:
+        self.locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    def lock(self, place: Place) -> threading.Lock:
+        """
+        Returns the lock for a place, creating it the first time the place is booked
+        """
+        lock = self.locks.get(place.name)
+        if lock is None:
+            with self._locks_guard:
+                lock = self.locks.setdefault(place.name, threading.Lock())
+        return lock
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """
+        Held while booking, any number of threads can hold it at once
+        """
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                if not self._shared:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """
+        Waits for every booking in progress to finish, and holds off new ones until released
+        """
+        with self._condition:
+            while self._exclusive or self._shared:
+                self._condition.wait()
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+    def book(self, place: Place, date: datetime.date, number: int, nights: int = 1,
+             on_booked: Callable[[], None] | None = None, verbose: bool = False) -> bool:
+        """
+        Books slots at a place for a number of nights
+
+        Args:
+            place: The place to book
+            date: The first night of the stay
+            number: The number of slots to book on each night
+            nights: The number of nights
+            on_booked: Called while the place is still locked if the booking is made,
+                       so changes can be recorded in the same order they were made
+            verbose: Print the outcome of the booking
+
+        Returns:
+            True if the booking was made
+
+        Raises:
+            ValueError: If fewer than 1 slot is booked, or the stay isn't within the bookable range
+        """
+        with self.shared(), self.lock(place):
+            booked = place.book(date=date, number=number, nights=nights, verbose=verbose)
+            if booked and on_booked is not None:
+                on_booked()
+            return booked
+
+    def available(self, place: Place, date: datetime.date, nights: int = 1) -> int:
+        """
+        Returns the fewest slots left on any night of a stay
+        """
+        with self.lock(place):
+            return place.available(date, nights)
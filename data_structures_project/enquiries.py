@@ -0,0 +1,215 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+from collections import deque
+import csv
+import heapq
+import itertools
+import os
+
+from data_structures_project.journal import Journal
+
+
+class Enquiry:
+    """
+    An enquiry for the staff of a place, answered highest priority first, then oldest first
+    """
+
+    __slots__ = ("id", "text", "timestamp", "priority")
+
+    def __init__(self, enquiry_id: int, text: str, timestamp: float = 0.0, priority: int = 0) -> None:
+        self.id = enquiry_id
+        self.text = text
+        self.timestamp = timestamp
+        self.priority = priority
+
+    def __str__(self) -> str:
+        return self.text
+
+    def sort_key(self) -> Tuple[int, float, int]:
+        return -self.priority, self.timestamp, self.id
+
+
+class EnquiryQueue:
+    """
+    The open enquiries of a place.
+
+    Enquiries are kept in a deque in the order they arrived and in a heap by priority.
+    Removing an enquiry only drops it from the id index, and it is skipped once it reaches
+    the front of the deque or heap, so any enquiry can be removed in O(1) and the next one
+    taken in O(log n). Both are rebuilt once most of their entries have been removed.
+    """
+
+    def __init__(self) -> None:
+        self.arrivals: deque = deque()
+        self.heap: List[Tuple[Tuple[int, float, int], Enquiry]] = []
+        self.live: Dict[int, Enquiry] = {}
+        self.removed = 0
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def __iter__(self) -> Iterator[Enquiry]:
+        """
+        Iterates over the open enquiries, oldest first
+        """
+        return (enquiry for enquiry in self.arrivals if enquiry.id in self.live)
+
+    def __contains__(self, enquiry_id: int) -> bool:
+        return enquiry_id in self.live
+
+    def by_priority(self) -> List[Enquiry]:
+        """
+        Returns the open enquiries in the order they should be answered
+        """
+        return sorted(self.live.values(), key=Enquiry.sort_key)
+
+    def push(self, enquiry: Enquiry) -> None:
+        self.arrivals.append(enquiry)
+        heapq.heappush(self.heap, (enquiry.sort_key(), enquiry))
+        self.live[enquiry.id] = enquiry
+
+    def remove(self, enquiry_id: int) -> Enquiry:
+        """
+        Removes an enquiry by its id
+
+        Raises:
+            KeyError: If the enquiry isn't open
+        """
+        enquiry = self.live.pop(enquiry_id)
+        self.removed += 1
+        if self.removed > len(self.live):
+            self.arrivals = deque(self)
+            self.heap = [(open_enquiry.sort_key(), open_enquiry) for open_enquiry in self.live.values()]
+            heapq.heapify(self.heap)
+            self.removed = 0
+        return enquiry
+
+    def peek(self) -> Enquiry | None:
+        """
+        Returns the enquiry to answer next, without removing it
+        """
+        while self.heap and self.heap[0][1].id not in self.live:
+            heapq.heappop(self.heap)
+        return self.heap[0][1] if self.heap else None
+
+    def pop(self) -> Enquiry:
+        """
+        Removes and returns the enquiry to answer next
+
+        Raises:
+            IndexError: If there are no open enquiries
+        """
+        enquiry = self.peek()
+        if enquiry is None:
+            raise IndexError("There are no open enquiries")
+        return self.remove(enquiry.id)
+
+    def oldest(self) -> Enquiry | None:
+        """
+        Returns the enquiry that has been open the longest
+        """
+        while self.arrivals and self.arrivals[0].id not in self.live:
+            self.arrivals.popleft()
+        return self.arrivals[0] if self.arrivals else None
+
+
+def _with_place(place) -> Iterator[Tuple[float, int, object, Enquiry]]:
+    return ((enquiry.timestamp, enquiry.id, place, enquiry) for enquiry in place.enquiries)
+
+
+def oldest_first(places: Iterable) -> Iterator[Tuple[object, Enquiry]]:
+    """
+    Iterates over the open enquiries of every place, oldest first
+
+    Yields:
+        The place and the enquiry
+    """
+    for _, _, place, enquiry in heapq.merge(*(_with_place(place) for place in places if place.enquiries),
+                                            key=lambda item: item[:2]):
+        yield place, enquiry
+
+
+class EnquiryLog(Journal):
+    """
+    Append-only log of the enquiries placed and answered, stored in place of enquiries.csv.
+
+    Placing an enquiry appends an "enquire" row, and answering one appends an "answer" row
+    naming its id as a tombstone, so neither rewrites the file. The log is rewritten with only
+    the open enquiries once most of its rows are dead.
+
+    Files in the old "name,enquiry" format are read as if every row had just been placed.
+    """
+
+    LEGACY_HEADER = ["name", "enquiry"]
+
+    def __init__(self, file_path: str = "csv/enquiries.csv", compact_after: int = 1000, auto_flush: bool = True) -> None:
+        """
+        Args:
+            file_path: Path of the log file
+            compact_after: The smallest number of rows worth compacting
+            auto_flush: If set to False, rows are buffered until flush is called
+        """
+        super().__init__(file_path, compact_after, auto_flush)
+        self.legacy = False
+        self.answered = 0
+        last_id = -1
+        for index, row in enumerate(super().__iter__()):
+            if index == 0 and row == self.LEGACY_HEADER:
+                self.legacy = True
+            elif self.legacy:
+                last_id += 1
+            elif row[0] == "answer":
+                self.answered += 1
+            else:
+                last_id = max(last_id, int(row[2]))
+        self.ids = itertools.count(last_id + 1)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """
+        Iterates over the rows written to disk, oldest first. Legacy rows are converted to "enquire" rows
+        """
+        rows = super().__iter__()
+        if not self.legacy:
+            yield from rows
+            return
+        next(rows, None)
+        for enquiry_id, (name, text) in enumerate(rows):
+            yield ["enquire", name, str(enquiry_id), "0", "0", text]
+
+    def next_id(self) -> int:
+        return next(self.ids)
+
+    def record_enquiry(self, name: str, enquiry: Enquiry) -> None:
+        self.record("enquire", name, enquiry.id, enquiry.timestamp, enquiry.priority, enquiry.text)
+
+    def record_answer(self, name: str, enquiry: Enquiry) -> None:
+        with self.lock:
+            self.answered += 1
+        self.record("answer", name, enquiry.id)
+
+    def needs_compaction(self) -> bool:
+        """
+        Returns True once more rows are dead than open, a placed row and its tombstone are both dead
+        """
+        return self.legacy or (self.entries >= self.compact_after and 4 * self.answered > self.entries)
+
+    def rewrite(self, places: Iterable) -> None:
+        """
+        Replaces the log with a row for each open enquiry. Written to a temporary file first and then renamed
+        """
+        temp_path = self.file_path + ".tmp"
+        with self.lock:
+            entries = 0
+            with open(temp_path, "w", newline="") as f:
+                csvwriter = csv.writer(f)
+                for place, enquiry in oldest_first(places):
+                    csvwriter.writerow(["enquire", place.name, enquiry.id, enquiry.timestamp, enquiry.priority,
+                                        enquiry.text])
+                    entries += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+            # The buffered rows are already part of the open enquiries
+            self.buffer.clear()
+            self.entries = entries
+            self.answered = 0
+            self.legacy = False
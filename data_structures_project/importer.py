@@ -0,0 +1,112 @@
+from typing import Dict, Iterable, List, Set, Tuple
+import datetime
+import itertools
+
+from data_structures_project.base import Place, Address
+from data_structures_project.utils import parse_date
+
+
+class BulkImporter:
+    """
+    Streams place and booking records into a Session.
+
+    Records are validated a batch at a time and applied straight to the places, without going
+    through the journal. Everything is written to disk with a single update_csv once the
+    import finishes, rather than once per record.
+
+    A place record is a dictionary with "name", "type", "address" and "avalability" keys.
+    A booking record is a dictionary with "name", "date" and "number" keys, and optionally "nights".
+    Addresses can be an Address or a "number - roadname - postcode" string, and dates can be a date
+    or a DD-MM-YYYY string.
+    """
+
+    def __init__(self, session, batch_size: int = 10000) -> None:
+        """
+        Args:
+            session: The Session to import into
+            batch_size: The number of records to validate and apply at a time
+        """
+        self.session = session
+        self.batch_size = batch_size
+        self.places: Dict[str, Place] = {place.name: place for place in session.places}
+        # Casefolded names of the places imported so far. The session's name index only has them once the import ends
+        self.imported_names: Set[str] = set()
+
+        self.imported_places = 0
+        self.imported_bookings = 0
+        self.errors: List[Tuple[dict, str]] = []
+
+    def validate_place(self, record: dict) -> Place:
+        """
+        Creates the Place for a place record
+
+        Raises:
+            ValueError: If the record is invalid
+        """
+        if (record["name"].casefold() in self.imported_names
+                or self.session.get_place(record["name"], include_poi=True) is not None):
+            raise ValueError(f"{record['name']} is already a place")
+        if record["type"] not in self.session.VALID_TYPES:
+            raise ValueError(f"{record['type']} is not one of {', '.join(self.session.VALID_TYPES)}")
+        avalability = int(record["avalability"])
+        if avalability < 1:
+            raise ValueError("The avalability must be at least 1")
+        address = record["address"]
+        if not isinstance(address, Address):
+            address = Address.from_string(address)
+        return Place(name=record["name"], _type=record["type"], address=address, avalability=avalability)
+
+    def validate_booking(self, record: dict) -> Tuple[Place, datetime.date, int, int]:
+        """
+        Looks up the place and parses the date for a booking record
+
+        Raises:
+            ValueError: If the record is invalid
+        """
+        place = self.places.get(record["name"])
+        if place is None:
+            raise ValueError(f"{record['name']} is not a place to stay")
+        date = record["date"]
+        if isinstance(date, str):
+            date = parse_date(date)
+        number = int(record["number"])
+        nights = int(record.get("nights", 1))
+        if number < 1 or nights < 1:
+            raise ValueError("The number of slots and nights must be at least 1")
+        return place, date, number, nights
+
+    def import_batch(self, records: List[dict]) -> None:
+        """
+        Validates a batch of records and applies the valid ones. Invalid records are added to errors
+        """
+        for record in records:
+            try:
+                if "date" in record:
+                    place, date, number, nights = self.validate_booking(record)
+                    if not place.book(date, number, nights=nights, verbose=False):
+                        raise ValueError(f"Not enough slots left at {place.name}")
+                    self.imported_bookings += 1
+                else:
+                    place = self.validate_place(record)
+                    self.session.places.append(place)
+                    self.places[place.name] = place
+                    self.imported_names.add(place.name.casefold())
+                    self.imported_places += 1
+            except (KeyError, ValueError) as error:
+                self.errors.append((record, str(error)))
+
+    def run(self, records: Iterable[dict]) -> Dict[str, int]:
+        """
+        Imports every record, then writes the session to disk once
+
+        Returns:
+            The number of places and bookings imported, and the number of records rejected
+        """
+        records = iter(records)
+        while batch := list(itertools.islice(records, self.batch_size)):
+            self.import_batch(batch)
+
+        self.session.invalidate_indexes()
+        self.session.mark_dirty("places", "bookings")
+        self.session.update_csv()
+        return {"places": self.imported_places, "bookings": self.imported_bookings, "errors": len(self.errors)}
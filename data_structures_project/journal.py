@@ -0,0 +1,93 @@
+from typing import Iterator, List
+import csv
+import os
+import threading
+
+
+class Journal:
+    """
+    Append-only log of the changes made since the CSV files were last written.
+
+    Each row is an operation name, the name of the place it applies to and the
+    arguments of the operation. Rows are flushed to disk as they are recorded so
+    a change costs the size of the row, not the size of the whole dataset.
+    """
+
+    def __init__(self, file_path: str = "csv/journal.csv", compact_after: int = 1000, auto_flush: bool = True) -> None:
+        """
+        Args:
+            file_path: Path of the journal file
+            compact_after: Number of entries after which the journal should be
+                           compacted into the CSV files
+            auto_flush: If set to False, entries are buffered until flush is called,
+                        so a burst of changes shares a single write to disk
+        """
+        self.file_path = file_path
+        self.compact_after = compact_after
+        self.auto_flush = auto_flush
+        self.buffer: List[list] = []
+        self.entries = 0
+        # Entries can be recorded from many threads at once
+        self.lock = threading.Lock()
+
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r", newline="") as f:
+                self.entries = sum(1 for _ in csv.reader(f))
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """
+        Iterates over the entries written to disk, oldest first
+        """
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, "r", newline="") as f:
+            for row in csv.reader(f):
+                if row:
+                    yield row
+
+    def record(self, operation: str, name: str, *args) -> None:
+        """
+        Appends an entry to the journal and forces it to disk
+
+        Args:
+            operation: The type of change, e.g. "book" or "enquire"
+            name: The name of the place the change applies to
+            args: The arguments needed to replay the change
+        """
+        with self.lock:
+            self.buffer.append([operation, name, *args])
+            self.entries += 1
+        if self.auto_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes any buffered entries and forces them to disk
+        """
+        with self.lock:
+            if not self.buffer:
+                return
+            with open(self.file_path, "a", newline="") as f:
+                csv.writer(f).writerows(self.buffer)
+                f.flush()
+                os.fsync(f.fileno())
+            self.buffer.clear()
+
+    def needs_compaction(self) -> bool:
+        """
+        Returns True once the journal has grown past the compaction threshold
+        """
+        return self.entries >= self.compact_after
+
+    def clear(self) -> None:
+        """
+        Empties the journal, called once its entries have been written to the CSV files
+        """
+        with self.lock:
+            with open(self.file_path, "w", newline=""):
+                pass
+            self.buffer.clear()
+            self.entries = 0
@@ -1,15 +1,62 @@
 from data_structures_project.base import Place, Address
-from data_structures_project.utils import prompt_number, display_options, prompt_date, prompt_yes_no, quick_sort, route_search
+from data_structures_project.utils import prompt_number, prompt_float, display_options, prompt_date, prompt_yes_no, quick_sort, route_search, \
+    parse_date
+from data_structures_project.journal import Journal
+from data_structures_project.search_index import SearchIndex, NameIndex
+from data_structures_project.availability import AvailabilityTree
+from data_structures_project.routing import RouteCache, route_matrix
+from data_structures_project.store import PlaceStore
+from data_structures_project.snapshot import Snapshot, SnapshotPlaces, write_snapshot, MAGIC
+from data_structures_project.enquiries import Enquiry, EnquiryLog, oldest_first
+from data_structures_project.spatial import KDTree
+from data_structures_project.booking import BookingEngine
+from data_structures_project.metrics import metrics
+from data_structures_project.analytics import OccupancyMatrix
 
 import datetime
+import time
 import csv
 import os
 
 
 class Session:
-    def __init__(self):
+    SNAPSHOT_PATH = "csv/snapshot.bin"
+    VALID_TYPES = ["Hotel", "Hostel", "BNB"]
+    TABLE_PATHS = {
+        "places": "csv/places_to_stay.csv",
+        "bookings": "csv/bookings.csv",
+        "neighbours": "csv/neighbours.csv",
+        "heuristics": "csv/heuristics.csv",
+        "locations": "csv/locations.csv"
+    }
+    # Tables that can be missing when loading
+    OPTIONAL_TABLES = {"locations"}
+    # The table each journal operation changes
+    OPERATION_TABLES = {
+        "add_place": "places",
+        "book": "bookings",
+        "neighbour": "neighbours",
+        "heuristic": "heuristics",
+        "locate": "locations"
+    }
+
+    def __init__(self, columnar=False, use_snapshot=False):
         
-        self.places = []
+        # Keep the places to stay in a columnar PlaceStore rather than a list of Place objects
+        self.columnar = columnar
+        # Write a binary snapshot alongside the CSV files, and load from it when it is up to date
+        self.use_snapshot = use_snapshot
+        self.places = PlaceStore() if columnar else []
+        # Built the first time they are needed, so loading never has to touch every place
+        self._search_index = None
+        self._route_cache = None
+        self._spatial_index = None
+        self._name_index = None
+        # The (x, y) coordinates of places and points of interest, by name. Only names are kept,
+        # so loading locations never has to decode a place from a snapshot
+        self.located = {}
+        # Places in display order, cleared whenever a place is added
+        self.sorted_places = None
         
         # Hard Code some points of intrest
         self.poi = [Place(name="Park", _type="POI", neighbours={"Train Station": 42, "Library": 87}, 
@@ -25,8 +72,16 @@ class Session:
                     Place(name="Cinema", _type="POI", neighbours={"Library": 85, "School": 39, "Museum": 99}, 
                           heuristics={'Park': 90, 'Train Station': 80, 'Library': 70, 'School': 40, 'Museum': 60})]
         
+        # Changes are appended here and only compacted into the CSV files periodically
+        self.journal = Journal()
+        # Tables changed since the CSV files were last written, only these are rewritten by update_csv
+        self.dirty = set()
+        # Enquiries are appended to their own log rather than the journal
+        self.enquiry_log = EnquiryLog()
+        # Bookings go through the engine so they can be made from many threads at once
+        self.booking_engine = BookingEngine()
+
         self.load_csv()
-        self.main_loop()
         
     @staticmethod
     def main_menu() -> int:
@@ -45,120 +100,635 @@ class Session:
               "8.\tExit\n")
         return prompt_number("Select an option: ", _range=(1, 7))
     
+    @metrics.timed("session.load_csv")
     def load_csv(self):
         """
         Reads data from CSV files and populates the places and poi attributes.
+
+        A name -> Place index is built once so every file is streamed in a single pass.
+        The number of rows and the time taken for each file is stored in load_stats.
         """
-        file_paths = [
-            "csv/places_to_stay.csv",
-            "csv/bookings.csv",
-            "csv/enquiries.csv",
-            "csv/neighbours.csv",
-            "csv/heuristics.csv"
-        ]
-
-        if all(os.path.exists(file_path) for file_path in file_paths):
-            with (open(file_paths[0], "r") as places_file,
-                open(file_paths[1], "r") as bookings_file,
-                open(file_paths[2], "r") as enquiries_file,
-                open(file_paths[3], "r") as neighbours_file,
-                open(file_paths[4], "r") as heuristics_file):
-                
-                readers = [csv.reader(file) for file in (places_file, bookings_file, enquiries_file, neighbours_file, heuristics_file)]
-                for reader in readers:
-                    next(reader, None)
-                    
+        file_paths = self.required_paths()
+
+        self.load_stats = {}
+        self.dirty = set()
+        self.located = {}
+        legacy_enquiries = []
+        snapshot_loaded = self.use_snapshot and self.snapshot_is_current(file_paths)
+
+        if snapshot_loaded:
+            legacy_enquiries = self.load_snapshot()
+        elif all(os.path.exists(file_path) for file_path in file_paths):
+            if self.columnar:
+                # The store is its own name index, and only creates Place objects when they are used
+                places_to_stay = places_index = PlaceStore()
+                for row in self.read_csv(file_paths[0]):
+                    places_to_stay.add(row[0], row[1], row[2], int(row[3]))
+            else:
                 places_to_stay = []
-                for row in readers[0]:
-                    places_to_stay.append(
-                        Place(
-                            name=row[0],
-                            _type=row[1],
-                            address=Address(*map(str.strip, row[2].split("-"))),
-                            avalability=int(row[3])
-                        )
+                places_index = {}
+                for row in self.read_csv(file_paths[0]):
+                    place = Place(
+                        name=row[0],
+                        _type=row[1],
+                        address=Address.from_string(row[2]),
+                        avalability=int(row[3])
                     )
+                    places_to_stay.append(place)
+                    places_index[place.name] = place
 
-                for row in readers[1]:
-                    for place in places_to_stay:
-                        if row[0] == place.name:
-                            place.bookings[datetime.datetime.strptime(row[1], "%d-%m-%Y")] = row[2]
-                            
-                for row in readers[2]:
-                    for place in places_to_stay:
-                        if row[0] == place.name:
-                            place.enquiries.append(row[1])
-                            
-                for row in readers[3]:
-                    for place in [*places_to_stay, *self.poi]:
-                        if row[0] == place.name:
-                            place.neighbours[row[1]] = int(row[2])
-                            
-                for row in readers[4]:
-                    for place in [*places_to_stay, *self.poi]:
-                        if row[0] == place.name:
-                            place.heuristics[row[1]] = int(row[2])
-                
-                self.places = places_to_stay
-        self.update_csv()
-    
-    def update_csv(self):
-        with open("csv/places_to_stay.csv", "w", newline="") as f:
-            csvwriter = csv.writer(f)
-            csvwriter.writerow(["name", "type", "address", "avalability"])
-            for place in self.places:
-                row = []
-                for item in place:
-                    row.append(item)
-                csvwriter.writerow(row)
-                
-        with open("csv/bookings.csv", "w", newline="") as f:
-            csvwriter = csv.writer(f)
-            csvwriter.writerow(["name", "date", "slots_remaining"])
-            for place in self.places:
-                for date, amount in place.bookings.items():
-                    csvwriter.writerow([place.name, date.strftime("%d-%m-%Y"), amount])
-                    
-        with open("csv/enquiries.csv", "w", newline="") as f:
-            csvwriter = csv.writer(f)
-            csvwriter.writerow(["name", "enquiry"])
-            for place in self.places:
-                for enquiry in place.enquiries:
-                    csvwriter.writerow([place.name, enquiry])
-                    
-        with open("csv/neighbours.csv", "w", newline="") as f:
-            csvwriter = csv.writer(f)
-            csvwriter.writerow(["name", "neighbour"])
-            for place in [*self.places, *self.poi]:
-                if place.neighbours:
-                    for neighbour, distance in place.neighbours.items():
-                        csvwriter.writerow([place.name, neighbour, distance])
-                    
-        with open("csv/heuristics.csv", "w", newline="") as f:
+            # Bookings are written grouped by place, so each place's nights are collected into one dict
+            # and handed over whole, rather than going through set_remaining for every row
+            bookings = {}
+            current_name = nights = None
+            for name, date, slots_remaining in self.read_csv(file_paths[1]):
+                if name != current_name:
+                    current_name = name
+                    nights = bookings.setdefault(name, {})
+                nights[parse_date(date)] = int(slots_remaining)
+            for name, nights in bookings.items():
+                place = places_index.get(name)
+                if place is not None:
+                    place.load_bookings(nights)
+
+            # Neighbours and heuristics can also belong to the points of interest
+            poi_index = {place.name: place for place in self.poi}
+
+            def find_loaded(name):
+                return places_index.get(name) or poi_index.get(name)
+
+            for row in self.read_csv(file_paths[2]):
+                place = find_loaded(row[0])
+                if place is not None:
+                    place.add_neighbour(row[1], int(row[2]))
+
+            for row in self.read_csv(file_paths[3]):
+                place = find_loaded(row[0])
+                if place is not None:
+                    place.add_heuristic(row[1], int(row[2]))
+
+            self.places = places_to_stay
+
+            self.load_locations()
+            loaded_count = len(places_to_stay)
+            legacy_enquiries = self.replay_journal(find_loaded)
+            if not self.columnar:
+                # Places added since the CSV files were written can have enquiries too.
+                # The PlaceStore indexes appended places itself
+                places_index.update((place.name, place) for place in places_to_stay[loaded_count:])
+            self.load_enquiries(places_index.get, legacy_enquiries)
+
+        # Enquiries moved out of the journal are in the enquiry log now, so the journal is cleared straight away.
+        # A missing or out of date snapshot is written now, so the next session can load from it
+        if (not all(os.path.exists(file_path) for file_path in file_paths) or self.journal.needs_compaction()
+                or self.enquiry_log.needs_compaction() or legacy_enquiries
+                or (self.use_snapshot and not snapshot_loaded)):
+            self.update_csv()
+
+        self._search_index = None
+        self.sorted_places = None
+        self._route_cache = None
+        self._spatial_index = None
+        self._name_index = None
+
+    @property
+    def search_index(self):
+        """
+        Trigram index over the places to stay
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.places)
+        return self._search_index
+
+    @property
+    def name_index(self):
+        """
+        Case-insensitive name index over the places to stay, then the points of interest.
+        Places in a snapshot or columnar store are only indexed by name, and decoded when they are returned
+        """
+        if self._name_index is None:
+            if isinstance(self.places, list):
+                self._name_index = NameIndex([*self.places, *self.poi])
+            else:
+                self._name_index = NameIndex(self.poi, self.places.place_names(), self.places.get)
+        return self._name_index
+
+    @property
+    def route_cache(self):
+        """
+        Cache of shortest path trees over every place with neighbours.
+        Routes from the points of interest are kept up to date as places are added
+        """
+        if self._route_cache is None:
+            self._route_cache = RouteCache.from_places([*self.places, *self.poi])
+            self._route_cache.track(place.name for place in self.poi if place.neighbours)
+        return self._route_cache
+
+    @property
+    def spatial_index(self):
+        """
+        k-d tree over the coordinates of every located place and point of interest
+        """
+        if self._spatial_index is None:
+            self._spatial_index = KDTree(self.located.items())
+        return self._spatial_index
+
+    def required_paths(self):
+        """
+        Returns the paths of the CSV files that must exist to load from them
+        """
+        return [file_path for table, file_path in self.TABLE_PATHS.items() if table not in self.OPTIONAL_TABLES]
+
+    def snapshot_is_current(self, file_paths):
+        """
+        Returns True if the snapshot exists and was written after every CSV file
+        """
+        if not os.path.exists(self.SNAPSHOT_PATH):
+            return False
+        with open(self.SNAPSHOT_PATH, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return False
+        snapshot_time = os.path.getmtime(self.SNAPSHOT_PATH)
+        return all(os.path.exists(file_path) and os.path.getmtime(file_path) <= snapshot_time for file_path in file_paths)
+
+    def load_snapshot(self):
+        """
+        Opens the binary snapshot in place of the CSV files. Places are only decoded when they are used
+
+        Returns:
+            The enquiry rows found in the journal, see replay_journal
+        """
+        start_time = time.perf_counter()
+        snapshot = Snapshot(self.SNAPSHOT_PATH)
+        self.places = SnapshotPlaces(snapshot)
+
+        # The points of interest are hard coded, so only their routing comes from the snapshot
+        poi_index = {place.name: place for place in self.poi}
+        for place in self.poi:
+            place_id = snapshot.find(place.name)
+            if place_id is not None and place_id >= snapshot.stay_count:
+                stored = snapshot.place(place_id)
+                place.neighbours = dict(stored.neighbours)
+                place.heuristics = dict(stored.heuristics)
+        self.load_stats[self.SNAPSHOT_PATH] = (len(snapshot), time.perf_counter() - start_time)
+
+        self.load_locations()
+        legacy_enquiries = self.replay_journal(lambda name: self.places.get(name) or poi_index.get(name))
+        self.load_enquiries(self.places.get, legacy_enquiries)
+        return legacy_enquiries
+
+    def read_csv(self, file_path):
+        """
+        Streams the rows of a CSV file, skipping the header.
+        Once the file is exhausted the row count and load time are stored in load_stats
+        """
+        start_time = time.perf_counter()
+        rows = 0
+        with open(file_path, "r", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                rows += 1
+                yield row
+        self.load_stats[file_path] = (rows, time.perf_counter() - start_time)
+
+    def load_locations(self):
+        """
+        Reads the coordinates of places from the locations CSV file, if there is one.
+        No places are looked up, so loading from a snapshot stays lazy
+        """
+        if not os.path.exists(self.TABLE_PATHS["locations"]):
+            return
+        for name, x, y in self.read_csv(self.TABLE_PATHS["locations"]):
+            self.located[name] = (float(x), float(y))
+
+    def replay_journal(self, find_loaded):
+        """
+        Applies the changes recorded in the journal on top of the data loaded from the CSV files
+
+        Args:
+            find_loaded: Function returning the loaded Place with a given name
+
+        Returns:
+            The (place, operation, value) of every enquire and answer row. Journals written before
+            enquiries had their own log can have these, and they are moved into it by load_enquiries
+        """
+        start_time = time.perf_counter()
+        added = {}
+        legacy_enquiries = []
+        for operation, name, *args in self.journal:
+            if operation == "add_place":
+                # The places may already have been written if update_csv stopped before clearing the journal
+                if name in added or find_loaded(name) is not None:
+                    continue
+                added[name] = Place(name=name, _type=args[0], address=Address.from_string(args[1]),
+                                    avalability=int(args[2]))
+                self.places.append(added[name])
+                self.dirty.add("places")
+                continue
+
+            place = added.get(name) or find_loaded(name)
+            if operation in ("enquire", "answer"):
+                if place is not None:
+                    legacy_enquiries.append((place, operation, args[0]))
+                continue
+            # The CSV files don't have this change yet
+            self.dirty.add(self.OPERATION_TABLES[operation])
+            match operation:
+                case "book":
+                    place.set_remaining(parse_date(args[0]), int(args[1]))
+                case "neighbour":
+                    place.add_neighbour(args[0], int(args[1]))
+                case "heuristic":
+                    place.add_heuristic(args[0], int(args[1]))
+                case "locate":
+                    place.location = self.located[name] = (float(args[0]), float(args[1]))
+        self.load_stats[self.journal.file_path] = (len(self.journal), time.perf_counter() - start_time)
+        return legacy_enquiries
+
+    def load_enquiries(self, find_loaded, legacy_enquiries=()):
+        """
+        Reads the open enquiries from the enquiry log, then moves any enquiries left in an old journal into it
+
+        Args:
+            find_loaded: Function returning the loaded place to stay with a given name
+            legacy_enquiries: The enquiry rows returned by replay_journal
+        """
+        start_time = time.perf_counter()
+        for operation, name, enquiry_id, *args in self.enquiry_log:
+            place = find_loaded(name)
+            if place is None:
+                continue
+            if operation == "enquire":
+                timestamp, priority, text = args
+                place.add_enquiry(Enquiry(int(enquiry_id), text, float(timestamp), int(priority)))
+            else:
+                place.remove_enquiry(int(enquiry_id))
+
+        for place, operation, value in legacy_enquiries:
+            if operation == "enquire":
+                self.enquire(place, value)
+                continue
+            # Old answer rows hold the position of the enquiry, oldest first, rather than its id
+            open_enquiries = list(place.enquiries)
+            if int(value) < len(open_enquiries):
+                self.answer(place, open_enquiries[int(value)].id)
+        self.load_stats[self.enquiry_log.file_path] = (len(self.enquiry_log), time.perf_counter() - start_time)
+
+    def record(self, operation, name, *args):
+        """
+        Records a change in the journal, compacting the journal into the CSV files once it grows too large
+        """
+        self.journal.record(operation, name, *args)
+        self.dirty.add(self.OPERATION_TABLES[operation])
+        self.compact_if_needed()
+
+    def compact_if_needed(self):
+        """
+        Compacts the journal into the CSV files once it grows too large.
+        Bookings are held off while the files are written so every place is written in a consistent state
+        """
+        if self.journal.needs_compaction():
+            with self.booking_engine.exclusive():
+                if self.journal.needs_compaction():
+                    self.update_csv()
+
+    @staticmethod
+    def write_csv(file_path, header, rows):
+        """
+        Writes a CSV file to a temporary file first and then renames it,
+        so a crash mid-write never leaves a half written file behind
+        """
+        temp_path = file_path + ".tmp"
+        with open(temp_path, "w", newline="") as f:
             csvwriter = csv.writer(f)
-            csvwriter.writerow(["starting_place", "ending_place", "distance"])
-            for place in [*self.places, *self.poi]:
-                if place.heuristics:
-                    for ending_place, distance in place.heuristics.items():
-                        csvwriter.writerow([place.name, ending_place, distance])
+            csvwriter.writerow(header)
+            csvwriter.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+            if metrics.enabled:
+                metrics.count("update_csv.bytes_written", os.fstat(f.fileno()).st_size)
+        os.replace(temp_path, file_path)
+
+    def table_rows(self, table):
+        """
+        Returns the header and rows of one of the CSV tables
+        """
+        match table:
+            case "places":
+                return ["name", "type", "address", "avalability"], (list(place) for place in self.places)
+            case "bookings":
+                return ["name", "date", "slots_remaining"], \
+                    ([place.name, date.strftime("%d-%m-%Y"), amount]
+                     for place in self.places for date, amount in place.bookings.items())
+            case "neighbours":
+                return ["name", "neighbour"], \
+                    ([place.name, neighbour, distance]
+                     for place in [*self.places, *self.poi] for neighbour, distance in place.neighbours.items())
+            case "heuristics":
+                return ["starting_place", "ending_place", "distance"], \
+                    ([place.name, ending_place, distance]
+                     for place in [*self.places, *self.poi] for ending_place, distance in place.heuristics.items())
+            case "locations":
+                return ["name", "x", "y"], ([name, *location] for name, location in self.located.items())
+        raise ValueError(f"{table} is not one of {', '.join(self.TABLE_PATHS)}")
+
+    def mark_dirty(self, *tables):
+        """
+        Marks tables as changed outside of the journal, so the next update_csv rewrites them.
+        Marks every table if none are given
+        """
+        self.dirty.update(tables or self.TABLE_PATHS)
+
+    @metrics.timed("session.update_csv")
+    def update_csv(self):
+        """
+        Rewrites the CSV files of the tables changed since they were last written, and any that are missing,
+        and the binary snapshot if enabled, then empties the journal and compacts the enquiry log if needed
+        """
+        written = False
+        for table, file_path in self.TABLE_PATHS.items():
+            if table in self.dirty or not os.path.exists(file_path):
+                self.write_csv(file_path, *self.table_rows(table))
+                written = True
+        self.dirty.clear()
+
+        if self.use_snapshot and (written or not self.snapshot_is_current(self.required_paths())):
+            if isinstance(self.places, SnapshotPlaces):
+                # The open snapshot has to be closed before it can be replaced
+                self.places.rewrite(self.SNAPSHOT_PATH, self.poi)
+            else:
+                write_snapshot(self.SNAPSHOT_PATH, self.places, self.poi)
+
+        self.journal.clear()
+        if self.enquiry_log.needs_compaction():
+            self.enquiry_log.rewrite(self.places)
                         
     def find_place(self, prompt="Please enter the name of the place to stay: ", include_poi=False, route=False):
         """
         Accepts a name, and checks if it is in the list
         """
-        places_to_check = self.places + self.poi if include_poi else self.places
-
-        if not places_to_check:
+        if not self.places and not (include_poi and self.poi):
             print("No places found.")
             return None
 
         while True:
-            place_name = input(prompt)
-            for place in places_to_check:
-                if place_name.lower() == place.name.lower():
-                    if not route or place.neighbours:
-                        return place
-            print("Name not found, please try again.")
+            name = input(prompt)
+            place = self.get_place(name, include_poi=include_poi, route=route)
+            if place is not None:
+                return place
+            suggestions = self.complete(name, include_poi=include_poi, route=route, limit=5) if name else []
+            if suggestions:
+                print(f"Name not found, did you mean: {', '.join(place.name for place in suggestions)}?")
+            else:
+                print("Name not found, please try again.")
+
+    @metrics.timed("session.get_place")
+    def get_place(self, name, include_poi=False, route=False):
+        """
+        Returns the place with the given name (ignoring case), or None if there isn't one
+        """
+        place = None
+        if self._name_index is None and not isinstance(self.places, list):
+            # Snapshot and columnar stores can find an exact name themselves, without building the name index
+            place = self.places.get(name) or next((poi for poi in self.poi if poi.name == name), None)
+        if place is None:
+            place = self.name_index.get(name)
+        if place is None or (place.type == "POI" and not include_poi) or (route and not place.neighbours):
+            return None
+        return place
+
+    def complete(self, prefix, include_poi=False, route=False, limit=10):
+        """
+        Returns the places whose name starts with the prefix (ignoring case), in name order
+        """
+        return self.name_index.prefix(prefix, limit, lambda place: (include_poi or place.type != "POI")
+                                      and (not route or bool(place.neighbours)))
+
+    def invalidate_indexes(self):
+        """
+        Drops the search index, sorted places and route cache so they are rebuilt on next use
+        """
+        self._search_index = None
+        self.sorted_places = None
+        self._route_cache = None
+        self._spatial_index = None
+        self._name_index = None
+
+    @metrics.timed("session.create_place")
+    def create_place(self, name, _type, address, avalability, neighbours=None, heuristics=None, location=None):
+        """
+        Adds a place to stay without prompting.
+        Neighbours and heuristics are added to both the new place and the existing places
+
+        Args:
+            name: The name of the place, which must not already be a place to stay or point of interest
+            _type: One of VALID_TYPES
+            address: The address of the place
+            avalability: The number of parties per night
+            neighbours: The distance to each neighbouring routable place
+            heuristics: The straight-line distance to each routable place.
+                        Not needed if the place has a location
+            location: The (x, y) coordinates of the place
+
+        Raises:
+            ValueError: If any of the details are invalid
+
+        Returns:
+            The new place
+        """
+        # Names are shared with the points of interest, so a place can't take one of theirs either
+        if self.get_place(name, include_poi=True) is not None:
+            raise ValueError(f"{name} is already a place")
+        if _type not in self.VALID_TYPES:
+            raise ValueError(f"{_type} is not one of {', '.join(self.VALID_TYPES)}")
+        if avalability < 1:
+            raise ValueError("The avalability must be at least 1")
+
+        neighbour_places = []
+        for neighbour, distance in (neighbours or {}).items():
+            place = self.get_place(neighbour, include_poi=True, route=True)
+            if place is None:
+                raise ValueError(f"{neighbour} is not a routable place")
+            neighbour_places.append((place, distance))
+        heuristic_places = []
+        for ending_place, distance in (heuristics or {}).items():
+            place = self.get_place(ending_place, include_poi=True)
+            if place is None:
+                raise ValueError(f"{ending_place} is not a place")
+            heuristic_places.append((place, distance))
+
+        for place, distance in neighbour_places:
+            place.add_neighbour(name, distance)  # Add the neighbour to both the newly added place and the existing place
+            if self._route_cache is not None:
+                self._route_cache.add_edge(place.name, name, distance)
+            self.record("neighbour", place.name, name, distance)
+        for place, distance in heuristic_places:
+            place.add_heuristic(name, distance)  # Add the heuristics to both the newly added place and the existing place
+            self.record("heuristic", place.name, name, distance)
+
+        place = Place(name=name, _type=_type, address=address, avalability=avalability,
+                      neighbours={place.name: distance for place, distance in neighbour_places},
+                      heuristics={place.name: distance for place, distance in heuristic_places})
+        self.places.append(place)
+        if self._search_index is not None:
+            self._search_index.add(place)
+        if self._name_index is not None:
+            self._name_index.add(place)
+        self.sorted_places = None
+        self.record("add_place", name, _type, str(address), avalability)
+        for neighbour, distance in place.neighbours.items():
+            self.record("neighbour", name, neighbour, distance)
+            if self._route_cache is not None:
+                self._route_cache.add_edge(name, neighbour, distance)
+        for ending_place, distance in place.heuristics.items():
+            self.record("heuristic", name, ending_place, distance)
+        if location is not None:
+            self.set_location(place, *location)
+        return place
+
+    def set_location(self, place, x, y):
+        """
+        Sets the coordinates of a place or point of interest
+        """
+        place.location = self.located[place.name] = (x, y)
+        if self._spatial_index is not None:
+            self._spatial_index.add(place.name, place.location)
+        self.record("locate", place.name, x, y)
+
+    def located_place(self, name):
+        """
+        Returns the place or point of interest with coordinates with the given name, with its location set.
+        Used to turn the names found by the spatial index into places, decoding only those
+        """
+        place = self.get_place(name, include_poi=True)
+        if place is not None:
+            place.location = self.located[name]
+        return place
+
+    def _around(self, place, _type):
+        point = self.located.get(place.name)
+        if point is None:
+            raise ValueError(f"{place.name} has no location")
+        poi_names = {poi.name for poi in self.poi}
+
+        def accept(name):
+            # Only places to stay, not the place itself or points of interest
+            if name == place.name or name in poi_names:
+                return False
+            return _type is None or getattr(self.located_place(name), "type", None) == _type
+        return point, accept
+
+    def nearest(self, place, k=5, _type=None):
+        """
+        Returns the k located places to stay closest to a place, as (distance, place) pairs, closest first
+
+        Args:
+            place: The place or point of interest to search around
+            k: The number of places to return
+            _type: If set, only return places of this type
+
+        Raises:
+            ValueError: If the place has no location
+        """
+        point, accept = self._around(place, _type)
+        return [(distance, self.located_place(name)) for distance, name in self.spatial_index.nearest(point, k, accept)]
+
+    def within(self, place, radius, _type=None):
+        """
+        Returns the located places to stay within a straight-line distance of a place,
+        as (distance, place) pairs, closest first
+
+        Raises:
+            ValueError: If the place has no location
+        """
+        point, accept = self._around(place, _type)
+        return [(distance, self.located_place(name))
+                for distance, name in self.spatial_index.within(point, radius, accept)]
+
+    def occupancy(self, first=None, last=None):
+        """
+        Returns an OccupancyMatrix of the bookings at every place to stay between two nights,
+        by default from the earliest to the latest booked night
+        """
+        return OccupancyMatrix(self.places, first, last)
+
+    @metrics.timed("session.search")
+    def search(self, search_value):
+        """
+        Returns the places to stay whose name, address or type contain the search value, sorted by name
+        """
+        return quick_sort(self.search_index.search(search_value), key=Place.sort_key)
+
+    @metrics.timed("session.book")
+    def book(self, place, date, number, nights=1, verbose=False):
+        """
+        Books slots at a place for a number of nights without prompting. Safe to call from many threads.
+        Returns True if the booking was made
+
+        Raises:
+            ValueError: If fewer than 1 slot is booked, or the stay isn't within the bookable range
+        """
+        def record_nights():
+            # Recorded while the place is locked, so the journal has this place's bookings in order
+            for night in range(nights):
+                night_date = date + datetime.timedelta(days=night)
+                self.journal.record("book", place.name, night_date.strftime("%d-%m-%Y"), place.bookings[night_date])
+            self.dirty.add("bookings")
+
+        booked = self.booking_engine.book(place, date, number, nights=nights, on_booked=record_nights, verbose=verbose)
+        if booked:
+            self.compact_if_needed()
+        return booked
+
+    @metrics.timed("session.enquire")
+    def enquire(self, place, enquiry, priority=0):
+        """
+        Places an enquiry for the staff of a place without prompting, returning the enquiry.
+        Enquiries with a higher priority are answered first
+        """
+        enquiry = Enquiry(self.enquiry_log.next_id(), enquiry, time.time(), priority)
+        place.add_enquiry(enquiry)
+        self.enquiry_log.record_enquiry(place.name, enquiry)
+        return enquiry
+
+    @metrics.timed("session.answer")
+    def answer(self, place, enquiry_id=None):
+        """
+        Answers (removes) one of a place's enquiries without prompting, returning the enquiry.
+        Answers the highest priority, oldest enquiry if no id is given
+        """
+        enquiry = place.remove_enquiry(enquiry_id)
+        self.enquiry_log.record_answer(place.name, enquiry)
+        if self.enquiry_log.needs_compaction():
+            self.enquiry_log.rewrite(self.places)
+        return enquiry
+
+    def oldest_enquiries(self):
+        """
+        Iterates over the open enquiries of every place to stay, oldest first, as (place, enquiry) pairs
+        """
+        return oldest_first(self.places)
+
+    @metrics.timed("session.route")
+    def route(self, start, end, use_heuristics=False):
+        """
+        Finds the shortest route between 2 places without prompting
+
+        Returns:
+            Path used to get to the destination and the distance travelled
+        """
+        if use_heuristics and end in self.located:
+            # Straight-line distances are computed from the coordinates as they are needed
+            return route_search(self.route_cache.graph, start, end, locations=self.spatial_index)
+        if use_heuristics:
+            heuristics = {}
+            for place in [*self.places, *self.poi]:
+                if place.heuristics:
+                    heuristics[place.name] = place.heuristics
+            return route_search(self.route_cache.graph, start, end, a_star_heuristics=heuristics)
+        # Repeat queries from the same start reuse the cached shortest path tree
+        return self.route_cache.route(start, end)
 
     def add_place(self):
         """
@@ -166,44 +736,40 @@ class Session:
         """
         while True:
             name = input("Please enter the name: ")
-            if name not in [place.name for place in self.places]:
+            if self.get_place(name, include_poi=True) is None:
                 break
-            print("That name is already a place to stay")
+            print("That name is already a place")
 
             
-        valid_types = ["Hotel", "Hostel", "BNB"]
-        display_options(options=valid_types)
-        _type = valid_types[prompt_number(prompt="Please enter the type: ", _range=(1, len(valid_types)))-1]
+        display_options(options=self.VALID_TYPES)
+        _type = self.VALID_TYPES[prompt_number(prompt="Please enter the type: ", _range=(1, len(self.VALID_TYPES)))-1]
         address = Address()
         address.get()
         avalability = prompt_number(prompt="Please enter the avalability (number of parties per night): ")
         
         enable_routing = prompt_yes_no(prompt="Do you want to enable routing for this place to stay (Y/N)? ")
         
+        neighbours = {}
+        heuristics = {}
+        location = None
         if enable_routing:
-            neighbours = {}
             num_neighbours = prompt_number(prompt=f"How many neighbours does {name} have? ")
             
             for i in range(1, num_neighbours+1):
                 place = self.find_place(prompt=f"Please enter neighbour {i}: ", include_poi=True, route=True)
-                distance = prompt_number(prompt=f"Please enter the distance to {place.name}: ")
-                neighbours[place.name] = distance
-                place.neighbours[name] = distance  # Add the neighbour to both the newly added place and the existing place
+                neighbours[place.name] = prompt_number(prompt=f"Please enter the distance to {place.name}: ")
                             
-            heuristics = {}
-            for place in [*self.places, *self.poi]:
-                if place.neighbours:
-                    straight_distance = prompt_number(prompt=f"Please enter the straight-line distance to {place.name}: ")
-                    heuristics[place.name] = straight_distance
-                    place.heuristics[name] = straight_distance  # Add the heuristics to both the newly added place and the existing place
-        else:
-            neighbours = None
-            heuristics = None
+            if prompt_yes_no(prompt=f"Do you know the coordinates of {name} (Y/N)? "):
+                # Straight-line distances are worked out from the coordinates
+                location = (prompt_float(prompt="Please enter the x coordinate: "),
+                            prompt_float(prompt="Please enter the y coordinate: "))
+            else:
+                for place in [*self.places, *self.poi]:
+                    if place.neighbours:
+                        heuristics[place.name] = prompt_number(prompt=f"Please enter the straight-line distance to {place.name}: ")
                 
-        
-        place = Place(name=name, _type=_type, address=address, avalability=avalability, neighbours=neighbours, heuristics=heuristics)
-        self.places.append(place)
-        self.update_csv()
+        self.create_place(name, _type, address, avalability, neighbours=neighbours, heuristics=heuristics,
+                          location=location)
         print("Place to stay added successfully")
         
     def search_place(self):
@@ -211,21 +777,15 @@ class Session:
         Searchs for a place to stay. Searchs based on name, address and type
         """
         search_value = input("SEARCH: ")
-        
-        matched_places = []
-        for place in self.places:
-            if search_value in place:
-                matched_places.append(place)
-        
-        matched_places = quick_sort(matched_places)
-        display_options(options=matched_places, empty_prompt="No places found!")
+        display_options(options=self.search(search_value), empty_prompt="No places found!")
         
     def display_all_places(self):
         """
         Display all places to stay.
         """
-        self.places = quick_sort(self.places)
-        display_options(options=self.places, empty_prompt="No places found!")
+        if self.sorted_places is None:
+            self.sorted_places = quick_sort(list(self.places), key=Place.sort_key)
+        display_options(options=self.sorted_places, empty_prompt="No places found!")
         
     def make_booking(self):
         """
@@ -234,11 +794,20 @@ class Session:
         place = self.find_place()
         if place is None:
             return
-        date = prompt_date(prompt="Please enter the date of the booking (DD-MM-YYYY): ", _range=(datetime.date.today(), None))
+        date = prompt_date(prompt="Please enter the date of the booking (DD-MM-YYYY): ",
+                           _range=(datetime.date.today(), AvailabilityTree.LAST_DATE))
+        nights = prompt_number(prompt="Please enter the number of nights: ",
+                               _range=(1, (AvailabilityTree.LAST_DATE - date).days + 1))
         number = prompt_number(prompt="Please enter the number of slots to book: ")
 
-        place.book(date=date, number=number)
-        self.update_csv()
+        self.book(place, date, number, nights=nights, verbose=True)
+
+    @metrics.timed("session.find_available")
+    def find_available(self, date, nights, party_size):
+        """
+        Returns every place to stay with at least party_size slots left on every night of the stay
+        """
+        return [place for place in self.places if self.booking_engine.available(place, date, nights) >= party_size]
             
         
     def make_enquiry(self):
@@ -247,8 +816,8 @@ class Session:
             return
 
         enquiry = input(f"Please enter your enquiry for the staff of {place.name}: ")
-        place.enquiries.append(enquiry)
-        self.update_csv()
+        urgent = prompt_yes_no("Is this enquiry urgent (Y/N)? ")
+        self.enquire(place, enquiry, priority=1 if urgent else 0)
         
         print("Thank you. Your enquiry has been placed")
         
@@ -263,17 +832,15 @@ class Session:
                 
         print(f"{len(place.enquiries)} Enquirys Found")
         
-        counter = 0
-        while counter < len(place.enquiries):
-            print(f"Enquiry {counter+1}: {place.enquiries[counter]}")
+        # Urgent enquiries first, then oldest first
+        for counter, enquiry in enumerate(place.enquiries.by_priority()):
+            print(f"Enquiry {counter+1}: {enquiry}")
             answer = prompt_yes_no("Do you want to answer this enquiry (Y/N)? ")
             if answer:
-                place.enquiries.pop(counter)
-                self.update_csv()
+                self.answer(place, enquiry.id)
                 print("The enquiry has been answered!")
             else:
                 print("The enquiry has not been answered!")
-                counter += 1
                 
                 
     def find_route(self):
@@ -285,26 +852,23 @@ class Session:
         if ending_place is None:
             return
         
-        weighted_graph = {}
-        for place in [*self.places, *self.poi]:
-            if place.neighbours:
-                weighted_graph[place.name] = place.neighbours
-                
         use_heuristics = prompt_yes_no(prompt="Use heuristics (Y/N)? ")
-                
-        if use_heuristics:
-            heuristics = {}
-            for place in [*self.places, *self.poi]:
-                if place.heuristics:
-                    heuristics[place.name] = place.heuristics
-        else:
-            heuristics = None
+        path = self.route(starting_place.name, ending_place.name, use_heuristics=use_heuristics)
         
-        path = route_search(weighted_graph, starting_place.name, ending_place.name, a_star_heuristics=heuristics)
         print(*path[0], sep='->')
         print(f"Distance: {path[1]}")
                 
 
+    def poi_distances(self, workers=1):
+        """
+        Returns the distance from every routable place to stay to each point of interest,
+        as a dictionary of place name to a dictionary of point of interest name to distance
+        """
+        sources = [place.name for place in self.places if place.neighbours]
+        targets = [place.name for place in self.poi]
+        distances, _ = route_matrix(self.route_cache.graph, sources, targets, workers=workers)
+        return {source: dict(zip(targets, row)) for source, row in zip(sources, distances)}
+
     def main_loop(self) -> None:
         """
         The main loop of the session
@@ -339,4 +903,4 @@ class Session:
 
 
 if __name__ == "__main__":
-    Session()
+    Session().main_loop()
@@ -0,0 +1,176 @@
+from typing import Callable, Dict, Iterator
+from contextlib import contextmanager
+import cProfile
+import functools
+import io
+import json
+import math
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+class Histogram:
+    """
+    Distribution of observed values, bucketed by powers of two so values of any size only take a few buckets
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        # Upper bound of a bucket -> number of values in the bucket
+        self.buckets: Dict[float, int] = {}
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        # value <= 2 ** exponent, as frexp returns a mantissa in [0.5, 1)
+        bound = math.ldexp(1.0, math.frexp(value)[1]) if value > 0 else 0.0
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+
+    def snapshot(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count,
+                "min": self.minimum, "max": self.maximum,
+                "buckets": {str(bound): count for bound, count in sorted(self.buckets.items())}}
+
+
+class Metrics:
+    """
+    Counters and histograms for the hot paths, off by default.
+
+    While disabled, instrumented code only checks the enabled flag, so leaving the
+    instrumentation in place costs next to nothing. Timers are histograms of seconds.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        # Metrics can be recorded from many threads at once
+        self.lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Adds value to a counter, if enabled
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Adds a value to a histogram, if enabled
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Records how long the block takes, in seconds, if enabled
+        """
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time)
+
+    def timed(self, name: str) -> Callable:
+        """
+        Decorator that records how long each call takes, in seconds, if enabled
+        """
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start_time)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict:
+        """
+        Returns a copy of every counter and histogram that can be serialised as JSON
+        """
+        with self.lock:
+            return {"counters": dict(self.counters),
+                    "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()}}
+
+    def export(self, file_path: str) -> None:
+        """
+        Writes a snapshot to a JSON file
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+# Shared by every instrumented module
+metrics = Metrics()
+
+
+@contextmanager
+def profile(cpu: bool = True, memory: bool = True, limit: int = 20) -> Iterator[Dict]:
+    """
+    Profiles the block with cProfile and tracemalloc. The yielded dictionary is filled in when the block exits
+
+    Args:
+        cpu: Profile the time spent in each function
+        memory: Trace the memory allocated
+        limit: The number of functions and allocation sites to report
+
+    Yields:
+        A dictionary with "cpu" (the pstats report, sorted by cumulative time), "memory_peak" (bytes)
+        and "memory_top" (the lines that allocated the most memory still held at the end of the block)
+    """
+    report = {}
+    profiler = cProfile.Profile() if cpu else None
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+            report["cpu"] = stream.getvalue()
+        if memory:
+            _, report["memory_peak"] = tracemalloc.get_traced_memory()
+            report["memory_top"] = [str(statistic) for statistic in
+                                    tracemalloc.take_snapshot().statistics("lineno")[:limit]]
+            if tracing:
+                tracemalloc.stop()
@@ -0,0 +1,455 @@
+from typing import Dict, Iterable, List, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+import heapq
+import random
+
+from data_structures_project.metrics import metrics
+
+
+def shortest_path_tree(graph: Dict[str, Dict[str, int]], start: str,
+                       targets: Iterable[str] | None = None) -> Tuple[Dict[str, float], Dict[str, str | None]]:
+    """
+    Runs dijkstra from a start node to every node in the graph
+
+    Args:
+        graph: A graph containing the nodes and vertices to search
+        start: The node to start from in the graph
+        targets: If set, stop as soon as the shortest path to each of these nodes is known
+
+    Returns:
+        The distance to every node and the previous node on the shortest path to it
+    """
+    distances = {node: float('inf') for node in graph}
+    distances[start] = 0
+    previous_nodes = {node: None for node in graph}
+    queue = [(0, start)]
+    remaining = set(targets) if targets is not None else None
+    expanded = 0
+    pushes = 1
+
+    while queue:
+        current_distance, current_node = heapq.heappop(queue)
+
+        if current_distance > distances[current_node]:
+            continue
+        expanded += 1
+
+        if remaining is not None:
+            remaining.discard(current_node)
+            if not remaining:
+                break
+
+        for neighbor, weight in graph.get(current_node, {}).items():
+            distance = current_distance + weight
+            if distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = distance
+                previous_nodes[neighbor] = current_node
+                heapq.heappush(queue, (distance, neighbor))
+                pushes += 1
+
+    if metrics.enabled:
+        metrics.count("shortest_path_tree.calls")
+        metrics.count("shortest_path_tree.nodes_expanded", expanded)
+        metrics.observe("shortest_path_tree.nodes_expanded", expanded)
+        metrics.count("shortest_path_tree.heap_pushes", pushes)
+
+    return distances, previous_nodes
+
+
+def build_path(previous_nodes: Dict[str, str | None], end: str) -> List[str]:
+    """
+    Walks the previous nodes back from the end to get the path taken
+    """
+    path = []
+    current_node = end
+    while previous_nodes.get(current_node) is not None:
+        path.append(current_node)
+        current_node = previous_nodes[current_node]
+    if path:
+        path.append(current_node)
+    path.reverse()
+    return path
+
+
+def repair_tree(graph: Dict[str, Dict[str, int]], distances: Dict[str, float], previous_nodes: Dict[str, str | None],
+                start: str, end: str, weight: int) -> int:
+    """
+    Updates a shortest path tree in place after an edge from start to end is added or made shorter.
+
+    This is the edge insertion case of Ramalingam and Reps' dynamic shortest path algorithm:
+    if the edge gives a shorter path to its end node, dijkstra is run from that node alone,
+    and only continues through nodes whose distance goes down. Every other node keeps its
+    distance, so the work done is proportional to the part of the tree that changed.
+
+    Args:
+        graph: The graph, already containing the new edge
+        distances: The distance to every node, updated in place
+        previous_nodes: The previous node on the shortest path to every node, updated in place
+        start: The node the edge leaves
+        end: The node the edge enters
+        weight: The weight of the edge
+
+    Returns:
+        The number of nodes whose distance went down
+    """
+    distance = distances.get(start, float('inf')) + weight
+    if distance >= distances.get(end, float('inf')):
+        return 0
+    distances[end] = distance
+    previous_nodes[end] = start
+
+    updated = 0
+    queue = [(distance, end)]
+    while queue:
+        current_distance, current_node = heapq.heappop(queue)
+        if current_distance > distances[current_node]:
+            continue
+        updated += 1
+        for neighbor, edge_weight in graph.get(current_node, {}).items():
+            distance = current_distance + edge_weight
+            if distance < distances.get(neighbor, float('inf')):
+                distances[neighbor] = distance
+                previous_nodes[neighbor] = current_node
+                heapq.heappush(queue, (distance, neighbor))
+    return updated
+
+
+class RouteCache:
+    """
+    Caches shortest path trees so repeated route queries only have to walk the path.
+
+    A tree is computed the first time a start node is queried and kept until it is evicted as
+    the least recently used. Trees from tracked start nodes (e.g. the points of interest) are
+    never evicted. Adding or shortening an edge repairs the cached trees in place with
+    repair_tree, and only lengthening an edge a tree uses drops that tree.
+    """
+
+    def __init__(self, graph: Dict[str, Dict[str, int]], max_trees: int = 128) -> None:
+        """
+        Args:
+            graph: A graph containing the nodes and vertices to search. The cache keeps its own copy
+            max_trees: The number of shortest path trees to keep
+        """
+        self.graph = {node: dict(edges) for node, edges in graph.items()}
+        self.max_trees = max_trees
+        self.trees: OrderedDict[str, Tuple[Dict[str, float], Dict[str, str | None]]] = OrderedDict()
+        self.tracked: Dict[str, Tuple[Dict[str, float], Dict[str, str | None]]] = {}
+
+    @classmethod
+    def from_places(cls, places: Iterable, max_trees: int = 128) -> "RouteCache":
+        """
+        Creates a route cache from every place with neighbours
+        """
+        return cls({place.name: place.neighbours for place in places if place.neighbours}, max_trees=max_trees)
+
+    def tree(self, start: str) -> Tuple[Dict[str, float], Dict[str, str | None]]:
+        """
+        Returns the shortest path tree from a start node, computing it if it isn't cached
+        """
+        if start in self.tracked:
+            return self.tracked[start]
+        if start in self.trees:
+            self.trees.move_to_end(start)
+            return self.trees[start]
+
+        tree = shortest_path_tree(self.graph, start)
+        self.trees[start] = tree
+        if len(self.trees) > self.max_trees:
+            self.trees.popitem(last=False)
+        return tree
+
+    def track(self, sources: Iterable[str]) -> None:
+        """
+        Computes the trees from each source now and keeps them up to date from then on
+        """
+        for source in sources:
+            if source not in self.tracked:
+                self.tracked[source] = self.trees.pop(source, None) or shortest_path_tree(self.graph, source)
+
+    def route(self, start: str, end: str) -> Tuple[List[str], float]:
+        """
+        Finds the shortest path between 2 locations, the same as route_search
+
+        Returns:
+            Path used to get to the destination and the distance travelled
+        """
+        distances, previous_nodes = self.tree(start)
+        return build_path(previous_nodes, end), distances.get(end, float('inf'))
+
+    def add_edge(self, start: str, end: str, weight: int) -> int:
+        """
+        Adds or changes a directed edge, repairing the cached trees it affects
+
+        Returns:
+            The number of tree entries that were updated
+        """
+        old_weight = self.graph.get(start, {}).get(end)
+        self.graph.setdefault(start, {})[end] = weight
+        self.graph.setdefault(end, {})
+
+        updated = 0
+        for trees in (self.trees, self.tracked):
+            for source, (distances, previous_nodes) in list(trees.items()):
+                if old_weight is not None and weight > old_weight:
+                    # A longer edge matters if the tree's shortest path used it
+                    if previous_nodes.get(end) == start:
+                        if trees is self.tracked:
+                            trees[source] = shortest_path_tree(self.graph, source)
+                        else:
+                            del trees[source]
+                else:
+                    updated += repair_tree(self.graph, distances, previous_nodes, start, end, weight)
+
+        if metrics.enabled:
+            metrics.count("route_cache.repaired_nodes", updated)
+        return updated
+
+    def clear(self) -> None:
+        """
+        Drops every cached tree, apart from the tracked ones
+        """
+        self.trees.clear()
+
+
+def reverse_graph(graph: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """
+    Returns the graph with the direction of every edge flipped
+    """
+    reversed_graph = {node: {} for node in graph}
+    for node, edges in graph.items():
+        for neighbor, weight in edges.items():
+            reversed_graph.setdefault(neighbor, {})[node] = weight
+    return reversed_graph
+
+
+class Landmarks:
+    """
+    Precomputed landmark distances for A*, Landmarks and Triangle inequality (ALT) routing.
+
+    The shortest distance to and from a handful of landmark nodes is stored for every node.
+    By the triangle inequality, d(node, end) >= d(landmark, end) - d(landmark, node) and
+    d(node, end) >= d(node, landmark) - d(end, landmark), which gives an admissible and
+    consistent heuristic for any pair of nodes without any hand-entered distances.
+    """
+
+    def __init__(self, graph: Dict[str, Dict[str, int]], count: int = 8, seed: int | None = None) -> None:
+        """
+        Args:
+            graph: A graph containing the nodes and vertices to search
+            count: The number of landmarks to use
+            seed: Seed for picking the first landmark
+        """
+        reversed_graph = reverse_graph(graph)
+        nodes = list(reversed_graph)
+
+        self.landmarks: List[str] = []
+        # Distances from each landmark to a node, and from a node to each landmark, in landmark order
+        self.from_landmark: Dict[str, List[float]] = {node: [] for node in nodes}
+        self.to_landmark: Dict[str, List[float]] = {node: [] for node in nodes}
+
+        if not nodes:
+            return
+
+        # Landmarks on the edge of the graph give the tightest bounds, so each new landmark
+        # is the node furthest from the ones already picked
+        closest = {node: float('inf') for node in nodes}
+        landmark = random.Random(seed).choice(nodes)
+        for _ in range(min(count, len(nodes))):
+            self.landmarks.append(landmark)
+            from_distances, _ = shortest_path_tree(graph, landmark)
+            to_distances, _ = shortest_path_tree(reversed_graph, landmark)
+            for node in nodes:
+                self.from_landmark[node].append(from_distances.get(node, float('inf')))
+                self.to_landmark[node].append(to_distances.get(node, float('inf')))
+                closest[node] = min(closest[node], from_distances.get(node, float('inf')))
+
+            reachable = [node for node in nodes if closest[node] != float('inf') and node not in self.landmarks]
+            if not reachable:
+                break
+            landmark = max(reachable, key=closest.__getitem__)
+
+    def estimate(self, node: str, end: str) -> float:
+        """
+        Returns a lower bound on the distance from a node to the end node
+        """
+        if node == end:
+            return 0
+        best = 0
+        for from_end, from_node, to_node, to_end in zip(self.from_landmark[end], self.from_landmark[node],
+                                                        self.to_landmark[node], self.to_landmark[end]):
+            if from_end != float('inf') and from_node != float('inf') and from_end - from_node > best:
+                best = from_end - from_node
+            if to_node != float('inf') and to_end != float('inf') and to_node - to_end > best:
+                best = to_node - to_end
+        return best
+
+
+class CSRGraph:
+    """
+    Compressed sparse row graph, with integer node ids in place of names.
+
+    The edges leaving node i are targets[offsets[i]:offsets[i + 1]] with the matching weights.
+    Everything is held in flat typed arrays, and the distance and previous node buffers used by
+    route_search are allocated once and reset after each query, touching only the nodes it reached.
+    """
+
+    UNREACHED = 2 ** 63 - 1
+
+    def __init__(self, graph: Dict[str, Dict[str, int]]) -> None:
+        """
+        Args:
+            graph: A graph containing the nodes and vertices to search
+        """
+        self.names: List[str] = list(graph)
+        self.ids: Dict[str, int] = {name: node_id for node_id, name in enumerate(self.names)}
+        for edges in graph.values():
+            for neighbor in edges:
+                if neighbor not in self.ids:
+                    self.ids[neighbor] = len(self.names)
+                    self.names.append(neighbor)
+
+        self.offsets = array('q', [0])
+        self.targets = array('q')
+        self.weights = array('q')
+        for name in self.names:
+            for neighbor, weight in graph.get(name, {}).items():
+                self.targets.append(self.ids[neighbor])
+                self.weights.append(weight)
+            self.offsets.append(len(self.targets))
+
+        self.distances = array('q', [self.UNREACHED]) * len(self.names)
+        self.previous_nodes = array('q', [-1]) * len(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def route_search(self, start: str, end: str) -> Tuple[List[str], float]:
+        """
+        Finds the shortest path between 2 locations using dijkstra, the same as utils.route_search
+
+        Returns:
+            Path used to get to the destination and the distance travelled
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        distances, previous_nodes = self.distances, self.previous_nodes
+        start_id, end_id = self.ids[start], self.ids[end]
+
+        distances[start_id] = 0
+        touched = [start_id]
+        queue = [(0, start_id)]
+
+        while queue:
+            current_distance, current_node = heapq.heappop(queue)
+
+            if current_node == end_id:
+                break
+
+            if current_distance > distances[current_node]:
+                continue
+
+            for edge in range(offsets[current_node], offsets[current_node + 1]):
+                neighbor = targets[edge]
+                distance = current_distance + weights[edge]
+                if distance < distances[neighbor]:
+                    if distances[neighbor] == self.UNREACHED:
+                        touched.append(neighbor)
+                    distances[neighbor] = distance
+                    previous_nodes[neighbor] = current_node
+                    heapq.heappush(queue, (distance, neighbor))
+
+        path = []
+        current_node = end_id
+        while previous_nodes[current_node] != -1:
+            path.append(self.names[current_node])
+            current_node = previous_nodes[current_node]
+        if path:
+            path.append(self.names[current_node])
+        path.reverse()
+        distance = distances[end_id] if distances[end_id] != self.UNREACHED else float('inf')
+
+        # Only reset what this query touched, so the next query starts clean without a full reallocation
+        for node in touched:
+            distances[node] = self.UNREACHED
+            previous_nodes[node] = -1
+
+        return path, distance
+
+
+# Graph shared with each worker process, sent once when the worker starts rather than with every task
+_worker_graph: Dict[str, Dict[str, int]] = {}
+
+
+def _init_worker(graph: Dict[str, Dict[str, int]]) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _routes_from_source(source: str, targets: List[str], paths: bool,
+                        graph: Dict[str, Dict[str, int]] | None = None) -> Tuple[List[float], List[List[str]] | None]:
+    """
+    Finds the distance, and optionally the path, from one source to every target with a single search
+    """
+    distances, previous_nodes = shortest_path_tree(_worker_graph if graph is None else graph, source, targets)
+    return ([distances.get(target, float('inf')) for target in targets],
+            [build_path(previous_nodes, target) for target in targets] if paths else None)
+
+
+def route_matrix(graph: Dict[str, Dict[str, int]], sources: List[str], targets: List[str], paths: bool = False,
+                 workers: int = 1) -> Tuple[List[List[float]], List[List[List[str]]] | None]:
+    """
+    Finds the shortest distance from every source to every target.
+    Each distinct source is searched once, stopping when every target has been reached
+
+    Args:
+        graph: A graph containing the nodes and vertices to search
+        sources: The nodes to start from
+        targets: The nodes to end on
+        paths: If set to True, also return the path for every pair
+        workers: The number of processes to spread the sources over. 1 runs everything in this process
+
+    Returns:
+        The distance matrix, with a row per source and a column per target,
+        and a matching matrix of paths if paths is True, otherwise None
+    """
+    unique_sources = list(dict.fromkeys(sources))
+
+    if workers > 1 and len(unique_sources) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph,)) as executor:
+            results = list(executor.map(_routes_from_source, unique_sources, [targets] * len(unique_sources),
+                                        [paths] * len(unique_sources)))
+    else:
+        results = [_routes_from_source(source, targets, paths, graph) for source in unique_sources]
+
+    by_source = dict(zip(unique_sources, results))
+    distances = [by_source[source][0] for source in sources]
+    return distances, [by_source[source][1] for source in sources] if paths else None
+
+
+def route_pairs(graph: Dict[str, Dict[str, int]], pairs: List[Tuple[str, str]],
+                workers: int = 1) -> List[Tuple[List[str], float]]:
+    """
+    Finds the shortest path for many start/end pairs, sharing one search between pairs with the same start
+
+    Returns:
+        The path and distance for each pair, in the same format as route_search
+    """
+    # Dicts are used as ordered sets, so repeated pairs are only searched for once
+    targets_by_source: Dict[str, Dict[str, None]] = {}
+    for start, end in pairs:
+        targets_by_source.setdefault(start, {})[end] = None
+
+    sources = list(targets_by_source)
+    if workers > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph,)) as executor:
+            results = list(executor.map(_routes_from_source, sources, map(list, targets_by_source.values()),
+                                        [True] * len(sources)))
+    else:
+        results = [_routes_from_source(source, list(targets_by_source[source]), True, graph) for source in sources]
+
+    routes = {}
+    for source, (distances, source_paths) in zip(sources, results):
+        for target, distance, path in zip(targets_by_source[source], distances, source_paths):
+            routes[(source, target)] = (path, distance)
+    return [routes[pair] for pair in pairs]
@@ -0,0 +1,176 @@
+from typing import Callable, Dict, Iterable, List, Set
+import bisect
+
+from data_structures_project.base import Place
+
+
+class SearchIndex:
+    """
+    Inverted trigram index over the name, type and address of each place.
+
+    Every lower-cased field is split into its overlapping 3 character grams, and each gram
+    maps to the ids of the places containing it. A search only has to look at the places
+    sharing every trigram of the pattern, and Boyer-Moore (Place.__contains__) is then used
+    to check those candidates.
+    """
+
+    GRAM_LENGTH = 3
+
+    def __init__(self, places: Iterable[Place] = ()) -> None:
+        self.places: List[Place] = []
+        self.postings: Dict[str, Set[int]] = {}
+
+        for place in places:
+            self.add(place)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    @classmethod
+    def grams(cls, text: str) -> Set[str]:
+        """
+        Returns the set of trigrams in a piece of text.
+        Text shorter than a trigram is kept whole so it can still be found
+        """
+        if len(text) < cls.GRAM_LENGTH:
+            return {text} if text else set()
+        return {text[index:index + cls.GRAM_LENGTH] for index in range(len(text) - cls.GRAM_LENGTH + 1)}
+
+    def add(self, place: Place) -> None:
+        """
+        Adds a place to the index
+        """
+        place_id = len(self.places)
+        self.places.append(place)
+
+        for field in (place.name, place.type, str(place.address)):
+            for gram in self.grams(field.lower()):
+                self.postings.setdefault(gram, set()).add(place_id)
+
+    def candidates(self, pattern: str) -> Set[int]:
+        """
+        Returns the ids of every place that could contain the pattern
+        """
+        pattern = pattern.lower()
+        if not pattern:
+            return set()
+
+        if len(pattern) < self.GRAM_LENGTH:
+            # Short patterns can't be split into trigrams, so collect every gram containing them
+            candidates = set()
+            for gram, place_ids in self.postings.items():
+                if pattern in gram:
+                    candidates |= place_ids
+            return candidates
+
+        postings = []
+        for gram in self.grams(pattern):
+            if gram not in self.postings:
+                return set()
+            postings.append(self.postings[gram])
+
+        # Intersect starting from the rarest trigram to keep the working set small
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for place_ids in postings[1:]:
+            candidates &= place_ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, pattern: str) -> List[Place]:
+        """
+        Returns every place whose name, type or address contains the pattern, in the order they were added
+        """
+        return [self.places[place_id] for place_id in sorted(self.candidates(pattern))
+                if pattern in self.places[place_id]]
+
+
+class NameIndex:
+    """
+    Case-insensitive index of places by name.
+
+    Names are casefolded into a dictionary for exact lookups, and kept in a sorted list so
+    every name starting with a prefix can be found with a binary search.
+
+    Places can also be indexed by name alone, for stores that only decode a place when it is
+    used. Those are looked up with find once they are returned, so building the index never
+    has to decode every place.
+    """
+
+    def __init__(self, places: Iterable[Place] = (), names: Iterable[str] = (),
+                 find: Callable[[str], Place | None] | None = None) -> None:
+        """
+        Args:
+            places: The places to index
+            names: The names of more places to index, ahead of places
+            find: Returns the place with an exact name, needed if names are given
+        """
+        self.names: Dict[str, str] = {}
+        self.places: Dict[str, Place] = {}
+        self.keys: List[str] = []
+        self.find = find
+
+        for name in names:
+            self.add_name(name)
+        for place in places:
+            self.add(place)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name.casefold() in self.names
+
+    def add_name(self, name: str) -> bool:
+        """
+        Adds a name to the index, returning False if a place is already using it
+        """
+        key = name.casefold()
+        if key in self.names:
+            return False
+        self.names[key] = name
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+        else:
+            bisect.insort(self.keys, key)
+        return True
+
+    def add(self, place: Place) -> None:
+        """
+        Adds a place to the index. A place already using the name is kept
+        """
+        if self.add_name(place.name):
+            self.places[place.name] = place
+
+    def _place(self, name: str) -> Place | None:
+        place = self.places.get(name)
+        return place if place is not None else self.find(name)
+
+    def get(self, name: str) -> Place | None:
+        """
+        Returns the place with the given name, ignoring case
+        """
+        found = self.names.get(name.casefold())
+        return None if found is None else self._place(found)
+
+    def prefix(self, prefix: str, limit: int | None = None,
+               accept: Callable[[Place], bool] | None = None) -> List[Place]:
+        """
+        Returns the places whose name starts with the prefix, ignoring case, in name order
+
+        Args:
+            prefix: The start of the name
+            limit: The most places to return
+            accept: If set, only places it returns True for are returned
+        """
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self.keys, prefix)
+        found = []
+        for index in range(start, len(self.keys)):
+            if not self.keys[index].startswith(prefix) or len(found) == limit:
+                break
+            place = self._place(self.names[self.keys[index]])
+            if accept is None or accept(place):
+                found.append(place)
+        return found
@@ -0,0 +1,220 @@
+from typing import Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import asyncio
+import json
+
+from data_structures_project.main import Session
+from data_structures_project.utils import parse_date
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 500: "Internal Server Error"}
+
+
+def place_json(place) -> Dict:
+    return {"name": place.name, "type": place.type, "address": str(place.address), "avalability": place.avalability}
+
+
+def enquiry_json(enquiry) -> Dict:
+    return {"id": enquiry.id, "enquiry": enquiry.text, "timestamp": enquiry.timestamp, "priority": enquiry.priority}
+
+
+class Server:
+    """
+    asyncio HTTP/JSON front-end over a Session.
+
+    Endpoints:
+        GET  /search?q=...                               Places matching the search
+        GET  /available?date=DD-MM-YYYY&nights=N&party=N Places that can take a party for a stay
+        POST /bookings    {"name", "date", "number", "nights"}
+        GET  /enquiries?name=...                         A place's open enquiries, in the order to answer them
+        POST /enquiries   {"name", "enquiry", "priority"}
+        POST /enquiries/answer {"name", "id"}            Answers the next enquiry if no id is given
+        GET  /route?start=...&end=...&heuristics=1
+
+    Requests are handled on the event loop, apart from routing which runs on a separate thread
+    so a slow route doesn't hold up other requests. The journal is flushed in groups: a change
+    is only acknowledged once it is on disk, but every change made while a flush is running
+    shares the next one.
+    """
+
+    def __init__(self, session: Session, flush_interval: float = 0.005) -> None:
+        """
+        Args:
+            session: The Session to serve
+            flush_interval: Seconds to wait for more changes before flushing the journal
+        """
+        self.session = session
+        self.session.journal.auto_flush = False
+        self.session.enquiry_log.auto_flush = False
+        self.flush_interval = flush_interval
+        # A single worker, as the route cache isn't shared between threads
+        self.route_executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_flush: asyncio.Future | None = None
+
+    async def flushed(self) -> None:
+        """
+        Waits until every change made so far has been written to disk
+        """
+        if self.pending_flush is None:
+            self.pending_flush = asyncio.ensure_future(self._flush())
+        await asyncio.shield(self.pending_flush)
+
+    async def _flush(self) -> None:
+        # Give other requests a moment to add their changes to this flush
+        await asyncio.sleep(self.flush_interval)
+        # Changes made from here on wait for the next flush
+        self.pending_flush = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def flush(self) -> None:
+        self.session.journal.flush()
+        self.session.enquiry_log.flush()
+
+    def find(self, name: str, route: bool = False):
+        if not isinstance(name, str):
+            raise HTTPError(400, "Names must be strings")
+        place = self.session.get_place(name, include_poi=route, route=route)
+        if place is None:
+            raise HTTPError(404, f"{name} not found")
+        return place
+
+    async def handle(self, method: str, path: str, query: Dict[str, str], body: Dict) -> Tuple[int, object]:
+        """
+        Runs a request, returning the status code and the JSON response
+        """
+        match method, path:
+            case "GET", "/search":
+                return 200, [place_json(place) for place in self.session.search(query.get("q", ""))]
+
+            case "GET", "/available":
+                places = self.session.find_available(parse_date(query["date"]), int(query.get("nights", 1)),
+                                                     int(query.get("party", 1)))
+                return 200, [place_json(place) for place in places]
+
+            case "POST", "/bookings":
+                place = self.find(body["name"])
+                number = int(body["number"])
+                if number < 1:
+                    raise HTTPError(400, "At least 1 slot must be booked")
+                if not self.session.book(place, parse_date(body["date"]), number, nights=int(body.get("nights", 1))):
+                    raise HTTPError(409, f"Not enough slots left at {place.name}")
+                await self.flushed()
+                return 201, {"booked": True}
+
+            case "GET", "/enquiries":
+                place = self.find(query["name"])
+                return 200, [enquiry_json(enquiry) for enquiry in place.enquiries.by_priority()] if place.enquiries else []
+
+            case "POST", "/enquiries":
+                enquiry = self.session.enquire(self.find(body["name"]), body["enquiry"], int(body.get("priority", 0)))
+                await self.flushed()
+                return 201, enquiry_json(enquiry)
+
+            case "POST", "/enquiries/answer":
+                place = self.find(body["name"])
+                enquiry_id = body.get("id")
+                try:
+                    enquiry = self.session.answer(place, None if enquiry_id is None else int(enquiry_id))
+                except (KeyError, IndexError):
+                    raise HTTPError(404, f"{place.name} has no open enquiry {enquiry_id if enquiry_id is not None else ''}")
+                await self.flushed()
+                return 200, enquiry_json(enquiry)
+
+            case "GET", "/route":
+                start = self.find(query["start"], route=True)
+                end = self.find(query["end"], route=True)
+                path, distance = await asyncio.get_running_loop().run_in_executor(
+                    self.route_executor, self.session.route, start.name, end.name, query.get("heuristics") == "1")
+                return 200, {"path": path, "distance": distance if distance != float('inf') else None}
+
+            case _, ("/search" | "/available" | "/bookings" | "/enquiries" | "/enquiries/answer" | "/route"):
+                raise HTTPError(405, f"{method} is not allowed on {path}")
+
+        raise HTTPError(404, f"{path} not found")
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles every request on a connection, keeping it open between requests
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                raw_body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                url = urlsplit(target)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                try:
+                    body = json.loads(raw_body) if raw_body else {}
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "The request body must be a JSON object")
+                    status, response = await self.handle(method, url.path, query, body)
+                except HTTPError as error:
+                    status, response = error.status, {"error": str(error)}
+                except (KeyError, ValueError, TypeError) as error:
+                    status, response = 400, {"error": f"Invalid request: {error}"}
+                except Exception as error:
+                    # Anything else is a bug, but the client still gets a response and the connection stays usable
+                    status, response = 500, {"error": f"{type(error).__name__}: {error}"}
+
+                payload = json.dumps(response).encode()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.base_events.Server:
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+    def close(self) -> None:
+        """
+        Writes any changes that haven't been flushed yet
+        """
+        self.flush()
+        self.route_executor.shutdown()
+
+
+async def serve(host: str, port: int) -> None:
+    server = Server(Session())
+    http_server = await server.start(host, port)
+    print(f"Serving on http://{host}:{port}")
+    try:
+        async with http_server:
+            await http_server.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the places to stay over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,247 @@
+from typing import Dict, Iterable, Iterator, List
+import datetime
+import mmap
+import os
+import struct
+
+from data_structures_project.base import Place, Address
+
+
+# File layout, every section directly follows the previous one:
+#   header
+#   string offsets   (string_count + 1) x u64, into the string data
+#   places           place_count x PLACE, the places to stay followed by the points of interest
+#   name index       place_count x u32, place ids sorted by name
+#   bookings         booking_count x BOOKING
+#   neighbours       neighbour_count x EDGE
+#   heuristics       heuristic_count x EDGE
+#   string data      utf-8
+HEADER = struct.Struct("<8sIIIIII")
+MAGIC = b"DSPSNAP2"
+STRING_OFFSET = struct.Struct("<Q")
+# name, type, address, avalability, then (start, count) for bookings, neighbours and heuristics
+PLACE = struct.Struct("<IIIiIIIIII")
+# The leading name field of a PLACE, to read a name without unpacking the whole record
+PLACE_NAME = struct.Struct("<I")
+NAME_INDEX = struct.Struct("<I")
+BOOKING = struct.Struct("<ii")
+EDGE = struct.Struct("<Ii")
+
+NO_AVALABILITY = -1
+
+
+def write_snapshot(file_path: str, places: Iterable[Place], poi: Iterable[Place] = ()) -> None:
+    """
+    Writes places, including their bookings and routing, to a binary snapshot file.
+    Enquiries are kept in the enquiry log instead.
+    The file is written to a temporary file first and then renamed into place
+
+    Args:
+        file_path: Path of the snapshot file
+        places: The places to stay
+        poi: The points of interest, stored for their routing
+    """
+    strings: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    place_records = []
+    bookings = []
+    neighbours = []
+    heuristics = []
+    places = list(places)
+    for place in [*places, *poi]:
+        record = [string_id(place.name), string_id(place.type), string_id(str(place.address)),
+                  NO_AVALABILITY if place.avalability is None else place.avalability]
+        for section, items in ((bookings, [(date.toordinal(), remaining) for date, remaining in place.bookings.items()]),
+                               (neighbours, [(string_id(name), distance) for name, distance in place.neighbours.items()]),
+                               (heuristics, [(string_id(name), distance) for name, distance in place.heuristics.items()])):
+            record += [len(section), len(items)]
+            section.extend(items)
+        place_records.append(record)
+
+    names = [record[0] for record in place_records]
+    string_list = list(strings)
+    name_index = sorted(range(len(place_records)), key=lambda place_id: string_list[names[place_id]])
+    encoded = [value.encode("utf-8") for value in string_list]
+
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(encoded), len(place_records), len(places), len(bookings), len(neighbours),
+                            len(heuristics)))
+        offset = 0
+        for value in encoded:
+            f.write(STRING_OFFSET.pack(offset))
+            offset += len(value)
+        f.write(STRING_OFFSET.pack(offset))
+        f.writelines(PLACE.pack(*record) for record in place_records)
+        f.writelines(NAME_INDEX.pack(place_id) for place_id in name_index)
+        f.writelines(BOOKING.pack(*booking) for booking in bookings)
+        f.writelines(EDGE.pack(*edge) for edge in neighbours)
+        f.writelines(EDGE.pack(*edge) for edge in heuristics)
+        f.writelines(encoded)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, file_path)
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file written by write_snapshot.
+
+    Opening a snapshot only reads the header. Records are decoded from the mapped file
+    when they are asked for, so only the places that are actually used are ever parsed.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, self.string_count, self.place_count, self.stay_count,
+         booking_count, neighbour_count, heuristic_count) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a snapshot file")
+
+        self.string_offsets = HEADER.size
+        self.places_offset = self.string_offsets + STRING_OFFSET.size * (self.string_count + 1)
+        self.name_index_offset = self.places_offset + PLACE.size * self.place_count
+        self.bookings_offset = self.name_index_offset + NAME_INDEX.size * self.place_count
+        self.neighbours_offset = self.bookings_offset + BOOKING.size * booking_count
+        self.heuristics_offset = self.neighbours_offset + EDGE.size * neighbour_count
+        self.strings_offset = self.heuristics_offset + EDGE.size * heuristic_count
+
+    def __len__(self) -> int:
+        return self.place_count
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def string(self, string_id: int) -> str:
+        start, = STRING_OFFSET.unpack_from(self.buffer, self.string_offsets + STRING_OFFSET.size * string_id)
+        end, = STRING_OFFSET.unpack_from(self.buffer, self.string_offsets + STRING_OFFSET.size * (string_id + 1))
+        return self.buffer[self.strings_offset + start:self.strings_offset + end].decode("utf-8")
+
+    def name(self, place_id: int) -> str:
+        name_id, = PLACE_NAME.unpack_from(self.buffer, self.places_offset + PLACE.size * place_id)
+        return self.string(name_id)
+
+    def find(self, name: str) -> int | None:
+        """
+        Returns the id of the place with the given name, using a binary search over the name index
+        """
+        low, high = 0, self.place_count
+        while low < high:
+            middle = (low + high) // 2
+            place_id, = NAME_INDEX.unpack_from(self.buffer, self.name_index_offset + NAME_INDEX.size * middle)
+            if self.name(place_id) < name:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.place_count:
+            place_id, = NAME_INDEX.unpack_from(self.buffer, self.name_index_offset + NAME_INDEX.size * low)
+            if self.name(place_id) == name:
+                return place_id
+        return None
+
+    def place(self, place_id: int) -> Place:
+        """
+        Decodes a place and its bookings and routing
+        """
+        (name_id, type_id, address_id, avalability, bookings_start, bookings_count,
+         neighbours_start, neighbours_count, heuristics_start, heuristics_count) = \
+            PLACE.unpack_from(self.buffer, self.places_offset + PLACE.size * place_id)
+
+        place = Place(name=self.string(name_id), _type=self.string(type_id),
+                      address=Address.from_string(self.string(address_id)),
+                      avalability=None if avalability == NO_AVALABILITY else avalability)
+
+        for index in range(bookings_start, bookings_start + bookings_count):
+            date, remaining = BOOKING.unpack_from(self.buffer, self.bookings_offset + BOOKING.size * index)
+            place.set_remaining(datetime.date.fromordinal(date), remaining)
+        for index in range(neighbours_start, neighbours_start + neighbours_count):
+            name_id, distance = EDGE.unpack_from(self.buffer, self.neighbours_offset + EDGE.size * index)
+            place.add_neighbour(self.string(name_id), distance)
+        for index in range(heuristics_start, heuristics_start + heuristics_count):
+            name_id, distance = EDGE.unpack_from(self.buffer, self.heuristics_offset + EDGE.size * index)
+            place.add_heuristic(self.string(name_id), distance)
+        return place
+
+
+class SnapshotPlaces:
+    """
+    Sequence of the places to stay in a Snapshot, usable in place of the Session.places list.
+
+    Places are decoded the first time they are accessed and then kept, so changes made to
+    them are not lost. Places appended after loading are held alongside the snapshot.
+    """
+
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+        self.materialised: Dict[int, Place] = {}
+        self.added: List[Place] = []
+        self.added_index: Dict[str, Place] = {}
+
+    def __len__(self) -> int:
+        return self.snapshot.stay_count + len(self.added)
+
+    def __iter__(self) -> Iterator[Place]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> Place:
+        if index < 0:
+            index += len(self)
+        if index >= self.snapshot.stay_count:
+            return self.added[index - self.snapshot.stay_count]
+
+        if index not in self.materialised:
+            self.materialised[index] = self.snapshot.place(index)
+        return self.materialised[index]
+
+    def append(self, place: Place) -> None:
+        self.added.append(place)
+        self.added_index[place.name] = place
+
+    def rewrite(self, file_path: str, poi: Iterable[Place] = ()) -> None:
+        """
+        Writes every place to a new snapshot file and switches over to it.
+
+        Every place is decoded first, so the current file can be unmapped before it is replaced,
+        which Windows requires. The decoded places are kept, as they hold the enquiries too
+        """
+        places = list(self)
+        old_path = self.snapshot.file_path
+        self.snapshot.close()
+        try:
+            write_snapshot(file_path, places, poi)
+        except BaseException:
+            self.snapshot = Snapshot(old_path)
+            raise
+        self.snapshot = Snapshot(file_path)
+        self.materialised = dict(enumerate(places))
+        self.added = []
+        self.added_index = {}
+
+    def place_names(self) -> Iterator[str]:
+        """
+        Iterates over the names of the places, without decoding them
+        """
+        for index in range(self.snapshot.stay_count):
+            yield self.snapshot.name(index)
+        for place in self.added:
+            yield place.name
+
+    def get(self, name: str, default=None) -> Place | None:
+        """
+        Returns the place with the given name
+        """
+        if name in self.added_index:
+            return self.added_index[name]
+        place_id = self.snapshot.find(name)
+        if place_id is None or place_id >= self.snapshot.stay_count:
+            return default
+        return self[place_id]
@@ -0,0 +1,151 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+import heapq
+import math
+
+
+class _Node:
+    __slots__ = ("name", "point", "axis", "left", "right")
+
+    def __init__(self, name: str, point: Tuple[float, float], axis: int) -> None:
+        self.name = name
+        self.point = point
+        self.axis = axis
+        self.left = None
+        self.right = None
+
+
+class KDTree:
+    """
+    2-d tree over named points, for nearest and within-radius queries.
+
+    The tree is built balanced from the points it starts with, by splitting on the median
+    of alternating axes, so queries visit O(log n) nodes on average. Points added later are
+    inserted at a leaf, and the tree is rebuilt once they make up half of it.
+
+    It also gives the straight-line distance between any two named points, so it can be
+    used by route_search as an A* heuristic in place of a stored table.
+    """
+
+    def __init__(self, points: Iterable[Tuple[str, Tuple[float, float]]] = ()) -> None:
+        self.points: Dict[str, Tuple[float, float]] = dict(points)
+        self.root = self._build(list(self.points.items()), 0)
+        self.inserted = 0
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.points
+
+    def _build(self, items: List[Tuple[str, Tuple[float, float]]], axis: int) -> _Node | None:
+        if not items:
+            return None
+        items.sort(key=lambda item: item[1][axis])
+        middle = len(items) // 2
+        node = _Node(items[middle][0], items[middle][1], axis)
+        node.left = self._build(items[:middle], 1 - axis)
+        node.right = self._build(items[middle + 1:], 1 - axis)
+        return node
+
+    def add(self, name: str, point: Tuple[float, float]) -> None:
+        """
+        Adds a point, or moves it if the name is already in the tree
+        """
+        if name in self.points:
+            self.points[name] = point
+            self.root = self._build(list(self.points.items()), 0)
+            return
+
+        self.points[name] = point
+        self.inserted += 1
+        if self.inserted * 2 > len(self.points):
+            self.root = self._build(list(self.points.items()), 0)
+            self.inserted = 0
+            return
+
+        if self.root is None:
+            self.root = _Node(name, point, 0)
+            return
+        node = self.root
+        while True:
+            side = "left" if point[node.axis] < node.point[node.axis] else "right"
+            child = getattr(node, side)
+            if child is None:
+                setattr(node, side, _Node(name, point, 1 - node.axis))
+                return
+            node = child
+
+    def distance(self, start: str, end: str) -> float:
+        """
+        Returns the straight-line distance between two named points
+        """
+        return math.dist(self.points[start], self.points[end])
+
+    def estimate(self, node: str, end: str) -> float:
+        """
+        Lower bound on the distance between two places for A*, assuming no route is shorter than
+        the straight line. 0 if either place has no coordinates
+        """
+        start_point = self.points.get(node)
+        end_point = self.points.get(end)
+        if start_point is None or end_point is None:
+            return 0
+        return math.dist(start_point, end_point)
+
+    def nearest(self, point: Tuple[float, float], k: int = 1,
+                accept: Callable[[str], bool] | None = None) -> List[Tuple[float, str]]:
+        """
+        Returns the k points closest to a point
+
+        Args:
+            point: The point to search around
+            k: The number of points to return
+            accept: If set, only points whose name it returns True for are returned
+
+        Returns:
+            (distance, name) pairs, closest first
+        """
+        # Max heap of the best k found so far, by negated distance
+        best: List[Tuple[float, str]] = []
+        # Each node is paired with the smallest distance any point below it could be from the point
+        stack = [(self.root, 0.0)] if self.root is not None else []
+        while stack:
+            node, bound = stack.pop()
+            if node is None or (len(best) == k and bound > -best[0][0]):
+                continue
+
+            if accept is None or accept(node.name):
+                distance = math.dist(point, node.point)
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, node.name))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, node.name))
+
+            offset = point[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if offset < 0 else (node.right, node.left)
+            # The far side is pushed first, so it is checked after the near side has tightened the bound
+            stack.append((far, max(bound, abs(offset))))
+            stack.append((near, bound))
+        return sorted((-distance, name) for distance, name in best)
+
+    def within(self, point: Tuple[float, float], radius: float,
+               accept: Callable[[str], bool] | None = None) -> List[Tuple[float, str]]:
+        """
+        Returns every point within a radius of a point, as (distance, name) pairs, closest first.
+        If accept is set, only points whose name it returns True for are returned
+        """
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            distance = math.dist(point, node.point)
+            if distance <= radius and (accept is None or accept(node.name)):
+                found.append((distance, node.name))
+            offset = point[node.axis] - node.point[node.axis]
+            if offset - radius <= 0:
+                stack.append(node.left)
+            if offset + radius >= 0:
+                stack.append(node.right)
+        return sorted(found)
@@ -0,0 +1,88 @@
+from typing import Dict, Iterator, List
+from array import array
+import sys
+
+from data_structures_project.base import Place, Address
+
+
+class PlaceStore:
+    """
+    Columnar storage for places to stay, usable in place of the Session.places list.
+
+    The name, type, address and avalability of every place are kept in parallel columns,
+    with each type stored once in a table and referenced by a one byte id. A Place object is
+    only created the first time a record is accessed, and is then kept so any bookings,
+    enquiries or routing added to it are not lost.
+    """
+
+    NO_AVALABILITY = -1
+
+    def __init__(self, places: List[Place] = ()) -> None:
+        self.names: List[str] = []
+        self.addresses: List[str] = []
+        self.avalabilities = array('q')
+        self.type_ids = array('B')
+        self.types: List[str] = []
+        self.type_lookup: Dict[str, int] = {}
+
+        self.ids: Dict[str, int] = {}
+        self.materialised: Dict[int, Place] = {}
+
+        for place in places:
+            self.append(place)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Place]:
+        for place_id in range(len(self.names)):
+            yield self[place_id]
+
+    def __getitem__(self, place_id: int) -> Place:
+        if place_id < 0:
+            place_id += len(self.names)
+        place = self.materialised.get(place_id)
+        if place is None:
+            avalability = self.avalabilities[place_id]
+            place = Place(name=self.names[place_id],
+                          _type=self.types[self.type_ids[place_id]],
+                          address=Address.from_string(self.addresses[place_id]),
+                          avalability=None if avalability == self.NO_AVALABILITY else avalability)
+            self.materialised[place_id] = place
+        return place
+
+    def add(self, name: str, _type: str, address: str, avalability: int | None) -> int:
+        """
+        Adds a place from its column values without creating a Place object, returning its id
+        """
+        if _type not in self.type_lookup:
+            self.type_lookup[_type] = len(self.types)
+            self.types.append(sys.intern(_type))
+
+        place_id = len(self.names)
+        self.names.append(name)
+        self.addresses.append(address)
+        self.avalabilities.append(self.NO_AVALABILITY if avalability is None else avalability)
+        self.type_ids.append(self.type_lookup[_type])
+        self.ids[name] = place_id
+        return place_id
+
+    def append(self, place: Place) -> None:
+        """
+        Adds an existing Place, which is kept as the object for that record
+        """
+        place_id = self.add(place.name, place.type, str(place.address), place.avalability)
+        self.materialised[place_id] = place
+
+    def place_names(self) -> Iterator[str]:
+        """
+        Iterates over the names of the places, without creating Place objects
+        """
+        return iter(self.names)
+
+    def get(self, name: str, default=None) -> Place | None:
+        """
+        Returns the place with the given name
+        """
+        place_id = self.ids.get(name)
+        return default if place_id is None else self[place_id]
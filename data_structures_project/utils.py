@@ -1,6 +1,12 @@
 from typing import Tuple, List, Union, Dict
+from functools import lru_cache
+import collections
 import datetime
 import heapq
+import math
+import time
+
+from data_structures_project.metrics import metrics
 
 
 def prompt_number(prompt: str, _range: Tuple[int | None, int | None] | None = None,
@@ -26,6 +32,24 @@ def prompt_number(prompt: str, _range: Tuple[int | None, int | None] | None = No
             print(f"{error_message}\n")
 
 
+def prompt_float(prompt: str, error_message: str = "Invalid Value!") -> float:
+    """
+    Prompts for any number, including 0, negative and decimal numbers
+
+    Args:
+        prompt: Prompt displayed before entering the number
+        error_message: Specify the error message to be displayed
+    """
+    while True:
+        try:
+            selected_option = float(input(prompt))
+            if math.isfinite(selected_option):
+                return selected_option
+            print(f"{error_message}\n")
+        except ValueError:
+            print(f"{error_message}\n")
+
+
 def prompt_date(prompt: str, _range: Tuple[datetime.date | None, datetime.date | None] | None = None,
                 error_message: str = "Invalid Date!") -> datetime.date:
     """
@@ -51,6 +75,16 @@ def prompt_date(prompt: str, _range: Tuple[datetime.date | None, datetime.date |
             print(f"{error_message}\n")
         
         
+@lru_cache(maxsize=4096)
+def parse_date(date_string: str) -> datetime.date:
+    """
+    Parses a DD-MM-YYYY date, as stored in the CSV files.
+    Results are cached as the same dates are repeated across many bookings
+    """
+    day, month, year = map(int, date_string.split('-'))
+    return datetime.date(year, month, day)
+
+
 def prompt_yes_no(prompt: str) -> bool:
     """
     Prompts the user for a Y/N response
@@ -76,19 +110,123 @@ def display_options(options: List[str], empty_prompt: str = "List is empty!") ->
             print(f"  \t{line}")
             
             
-def quick_sort(array):
+INSERTION_SORT_THRESHOLD = 16
+
+
+def quick_sort(array: List, key=None) -> List:
     """
-    An implementation of quick sort.
+    An in-place introsort (quick sort falling back to heap sort).
+
+    Sort keys are computed once per item rather than on every comparison, and ties are
+    broken on the original position so the sort is stable. The partitioning works on
+    the smaller side first and switches to heap sort past 2*log2(n) levels, so neither
+    the stack depth nor the running time can degrade on sorted or all-equal input.
+
+    Args:
+        array: The list to sort, sorted in place
+        key: Function computing the sort key of an item. Items are compared directly if None
+
+    Returns:
+        The sorted list (the same list object that was passed in)
     """
     if len(array) <= 1:
         return array
-    
-    pivot = array[len(array) // 2]
-    left = [x for x in array if x < pivot]
-    middle = [x for x in array if x == pivot]
-    right = [x for x in array if x > pivot]
-    
-    return quick_sort(left) + middle + quick_sort(right)
+
+    keys = [(item if key is None else key(item), index) for index, item in enumerate(array)]
+    order = list(range(len(array)))
+
+    _introsort(keys, order, 0, len(order) - 1, 2 * len(order).bit_length())
+
+    array[:] = [array[index] for index in order]
+    return array
+
+
+def _introsort(keys: List, order: List[int], low: int, high: int, depth_limit: int) -> None:
+    """
+    Sorts order[low:high+1] by keys, looping on the larger partition and only recursing on the smaller one
+    """
+    while high - low + 1 > INSERTION_SORT_THRESHOLD:
+        if depth_limit == 0:
+            _heap_sort(keys, order, low, high)
+            return
+        depth_limit -= 1
+
+        pivot_position = _partition(keys, order, low, high)
+        if pivot_position - low < high - pivot_position:
+            _introsort(keys, order, low, pivot_position - 1, depth_limit)
+            low = pivot_position + 1
+        else:
+            _introsort(keys, order, pivot_position + 1, high, depth_limit)
+            high = pivot_position - 1
+
+    _insertion_sort(keys, order, low, high)
+
+
+def _partition(keys: List, order: List[int], low: int, high: int) -> int:
+    """
+    Partitions order[low:high+1] around a median-of-three pivot, returning the pivot's final position
+    """
+    middle = (low + high) // 2
+    if keys[order[middle]] < keys[order[low]]:
+        order[middle], order[low] = order[low], order[middle]
+    if keys[order[high]] < keys[order[low]]:
+        order[high], order[low] = order[low], order[high]
+    if keys[order[high]] < keys[order[middle]]:
+        order[high], order[middle] = order[middle], order[high]
+
+    # Move the pivot out of the way while partitioning
+    order[middle], order[high - 1] = order[high - 1], order[middle]
+    pivot = keys[order[high - 1]]
+
+    left = low
+    right = high - 1
+    while True:
+        left += 1
+        while keys[order[left]] < pivot:
+            left += 1
+        right -= 1
+        while pivot < keys[order[right]]:
+            right -= 1
+        if left >= right:
+            break
+        order[left], order[right] = order[right], order[left]
+
+    order[left], order[high - 1] = order[high - 1], order[left]
+    return left
+
+
+def _insertion_sort(keys: List, order: List[int], low: int, high: int) -> None:
+    for index in range(low + 1, high + 1):
+        current = order[index]
+        current_key = keys[current]
+        position = index - 1
+        while position >= low and current_key < keys[order[position]]:
+            order[position + 1] = order[position]
+            position -= 1
+        order[position + 1] = current
+
+
+def _heap_sort(keys: List, order: List[int], low: int, high: int) -> None:
+    length = high - low + 1
+
+    def sift_down(root: int, end: int) -> None:
+        while True:
+            child = 2 * root + 1
+            if child >= end:
+                return
+            if child + 1 < end and keys[order[low + child]] < keys[order[low + child + 1]]:
+                child += 1
+            if keys[order[low + root]] < keys[order[low + child]]:
+                order[low + root], order[low + child] = order[low + child], order[low + root]
+                root = child
+            else:
+                return
+
+    for root in range(length // 2 - 1, -1, -1):
+        sift_down(root, length)
+    for end in range(length - 1, 0, -1):
+        order[low], order[low + end] = order[low + end], order[low]
+        sift_down(0, end)
  
  
 def boyer_moore_search(text, pattern):
@@ -108,6 +246,9 @@ def boyer_moore_search(text, pattern):
     for index in range(pattern_length):
         last_occurrence[pattern[index]] = index
         
+    if metrics.enabled:
+        return _counted_boyer_moore_search(text, pattern, last_occurrence)
+
     shift = 0
     while shift <= text_length - pattern_length:
         match_index = pattern_length - 1
@@ -122,6 +263,199 @@ def boyer_moore_search(text, pattern):
             shift += max(1, match_index - char_last_occurrence)
 
     return False
+
+
+def _counted_boyer_moore_search(text, pattern, last_occurrence):
+    """
+    boyer_moore_search, counting the character comparisons and shifts made.
+    Kept separate so the uninstrumented search doesn't pay for the counting
+    """
+    pattern_length = len(pattern)
+    comparisons = shifts = 0
+    found = False
+
+    shift = 0
+    while shift <= len(text) - pattern_length:
+        match_index = pattern_length - 1
+
+        while match_index >= 0:
+            comparisons += 1
+            if pattern[match_index] != text[shift + match_index]:
+                break
+            match_index -= 1
+
+        if match_index < 0:
+            found = True
+            break
+        char_last_occurrence = last_occurrence.get(text[shift + match_index], -1)
+        shift += max(1, match_index - char_last_occurrence)
+        shifts += 1
+
+    metrics.count("boyer_moore_search.calls")
+    metrics.count("boyer_moore_search.comparisons", comparisons)
+    metrics.count("boyer_moore_search.shifts", shifts)
+    return found
+
+
+class BoyerMoore:
+    """
+    A precompiled Boyer-Moore matcher for a single pattern.
+    The bad character and good suffix tables are built once and reused for every text searched.
+    """
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+
+        self.last_occurrence = {}
+        for index in range(len(pattern)):
+            self.last_occurrence[pattern[index]] = index
+
+        self.good_suffix = self.good_suffix_table(pattern)
+
+    @staticmethod
+    def good_suffix_table(pattern: str) -> List[int]:
+        """
+        Builds the strong good suffix shift table.
+        good_suffix[i] is the shift to use when a mismatch happens at pattern[i-1]
+        """
+        pattern_length = len(pattern)
+        good_suffix = [0] * (pattern_length + 1)
+        border = [0] * (pattern_length + 1)
+
+        # Case 1: the matched suffix occurs elsewhere in the pattern
+        index = pattern_length
+        border_index = pattern_length + 1
+        border[index] = border_index
+        while index > 0:
+            while border_index <= pattern_length and pattern[index - 1] != pattern[border_index - 1]:
+                if good_suffix[border_index] == 0:
+                    good_suffix[border_index] = border_index - index
+                border_index = border[border_index]
+            index -= 1
+            border_index -= 1
+            border[index] = border_index
+
+        # Case 2: only part of the matched suffix occurs as a prefix of the pattern
+        border_index = border[0]
+        for index in range(pattern_length + 1):
+            if good_suffix[index] == 0:
+                good_suffix[index] = border_index
+            if index == border_index:
+                border_index = border[border_index]
+
+        return good_suffix
+
+    def search(self, text: str) -> bool:
+        """
+        Returns True if the pattern occurs in the text
+        """
+        pattern = self.pattern
+        pattern_length = len(pattern)
+        text_length = len(text)
+
+        if pattern_length == 0 or pattern_length > text_length:
+            return False
+
+        shift = 0
+        while shift <= text_length - pattern_length:
+            match_index = pattern_length - 1
+
+            while match_index >= 0 and pattern[match_index] == text[shift + match_index]:
+                match_index -= 1
+
+            if match_index < 0:
+                return True
+            else:
+                char_last_occurrence = self.last_occurrence.get(text[shift + match_index], -1)
+                shift += max(self.good_suffix[match_index + 1], match_index - char_last_occurrence)
+
+        return False
+
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton, finding every one of a set of patterns in a single pass over a text.
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        self.patterns = patterns
+
+        # Each state has its transitions, a failure link and the indexes of the patterns ending there
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[set] = [set()]
+
+        for pattern_index, pattern in enumerate(patterns):
+            # Empty patterns never match, the same as boyer_moore_search
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append(set())
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.outputs[state].add(pattern_index)
+
+        # Breadth first so every failure link points at a state that is already complete.
+        # States one character deep always fail back to the root
+        queue = collections.deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] |= self.outputs[self.fail[next_state]]
+
+    def search(self, text: str) -> set:
+        """
+        Returns the indexes of every pattern occurring in the text
+        """
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(char, 0)
+            if self.outputs[state]:
+                found |= self.outputs[state]
+        return found
+
+
+def batch_search(places: List, patterns: List[str], precompiled: bool = False) -> List[Tuple[str, object]]:
+    """
+    Searches every place for every pattern at once.
+    Matches are case insensitive against the name, type and address, the same as Place.__contains__
+
+    Args:
+        places: The places to search
+        patterns: The search terms
+        precompiled: If set to False, use a single Aho-Corasick automaton (default).
+                     Otherwise use a precompiled Boyer-Moore matcher per pattern
+
+    Returns:
+        Every (pattern, place) pair where the pattern was found in the place
+    """
+    lowered_patterns = [pattern.lower() for pattern in patterns]
+    if precompiled:
+        matchers = [BoyerMoore(pattern) for pattern in lowered_patterns]
+    else:
+        automaton = AhoCorasick(lowered_patterns)
+
+    hits = []
+    for place in places:
+        texts = (place.name.lower(), place.type.lower(), str(place.address).lower())
+        if precompiled:
+            found = {index for index, matcher in enumerate(matchers) if any(matcher.search(text) for text in texts)}
+        else:
+            found = set().union(*(automaton.search(text) for text in texts))
+        hits.extend((patterns[index], place) for index in sorted(found))
+    return hits
             
             
 def heuristic(start, end, heuristic_values):
@@ -130,10 +464,87 @@ def heuristic(start, end, heuristic_values):
     """
     if start == end:
         return 0
-    return heuristic_values[start][end]
+    # Places added without a heuristic to the end get 0, which never overestimates
+    return heuristic_values.get(start, {}).get(end, 0)
 
 
-def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_heuristics: None | Dict[str, Dict[str, int]] = None):
+def _bidirectional_search(graph: Dict[str, Dict[str, int]], reverse_graph: Dict[str, Dict[str, int]], start: str,
+                          end: str, estimator=None) -> Tuple[List[str], float, int, int]:
+    """
+    Searches forward from start and backward from end at the same time, expanding whichever side
+    has the smaller key, until the two smallest keys add up to the shortest route found between them.
+
+    With an estimator each side is an A* search, using half the difference of the estimates to
+    the end and from the start as its potential. The two potentials then add up to 0, so the same
+    stopping rule holds, and both stay consistent if the estimates are.
+
+    Returns:
+        The path, the distance, and the number of nodes expanded and pushed onto either queue
+    """
+    if start == end:
+        return [], 0, 0, 0
+
+    if estimator is None:
+        def potential(node):
+            return 0
+    else:
+        def potential(node):
+            return (estimator.estimate(node, end) - estimator.estimate(start, node)) / 2
+
+    # Side 0 searches forward from the start, side 1 backward from the end
+    graphs = (graph, reverse_graph)
+    signs = (1, -1)
+    queues = ([(potential(start), 0, start)], [(-potential(end), 0, end)])
+    distances = ({start: 0}, {end: 0})
+    previous_nodes = ({start: None}, {end: None})
+    best = float('inf')
+    meeting = None
+    expanded = 0
+    pushes = 2
+
+    while queues[0] and queues[1]:
+        # Any route not found yet is at least as long as the two smallest keys
+        if queues[0][0][0] + queues[1][0][0] >= best:
+            break
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        queue, own, other, previous, sign = queues[side], distances[side], distances[1 - side], previous_nodes[side], signs[side]
+
+        _, current_distance, current_node = heapq.heappop(queue)
+        if current_distance > own[current_node]:
+            continue
+        expanded += 1
+
+        for neighbor, weight in graphs[side][current_node].items():
+            distance = current_distance + weight
+            if distance < own.get(neighbor, float('inf')):
+                own[neighbor] = distance
+                previous[neighbor] = current_node
+                heapq.heappush(queue, (distance + sign * potential(neighbor), distance, neighbor))
+                pushes += 1
+            # The edge joins the two searches
+            if neighbor in other and distance + other[neighbor] < best:
+                best = distance + other[neighbor]
+                meeting = (current_node, neighbor) if side == 0 else (neighbor, current_node)
+
+    if meeting is None:
+        return [], best, expanded, pushes
+
+    # Walk back to the start from the forward side of the meeting edge, then on to the end from the backward side
+    path = []
+    current_node = meeting[0]
+    while current_node is not None:
+        path.insert(0, current_node)
+        current_node = previous_nodes[0][current_node]
+    current_node = meeting[1]
+    while current_node is not None:
+        path.append(current_node)
+        current_node = previous_nodes[1][current_node]
+    return path, best, expanded, pushes
+
+
+def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_heuristics: None | Dict[str, Dict[str, int]] = None,
+                 landmarks=None, locations=None, bidirectional: bool = False,
+                 reverse_graph: Dict[str, Dict[str, int]] | None = None):
     """
     This function finds the shortest path between 2 locations.
     The algorithm used by default is dijkstra, but A* can be used if a set of heuristic values are specified
@@ -144,14 +555,41 @@ def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_
         end: The node to end on in the graph
         a_star_heuristics: If set to None, use dijkstra (default).
                            Otherwise contains heuristic values to use the A* algorithm
+        landmarks: If set, use A* with heuristics computed from precomputed landmark
+                   distances (see routing.Landmarks) instead of hand-entered ones
+        locations: If set, use A* with the straight-line distance between the places'
+                   coordinates (see spatial.KDTree) instead of hand-entered heuristics
+        bidirectional: If set to True, search from both ends at once and stop where they meet.
+                       Works with dijkstra, landmarks and locations
+        reverse_graph: The graph with every edge reversed, for the backward search.
+                       Defaults to graph, as the neighbour graph is symmetric
 
     Returns:
         Path used to get to the destination and the distance travelled
+
+    Raises:
+        ValueError: If bidirectional is used with hand-entered heuristics, which only estimate the distance to the end
     """
+    start_time = time.perf_counter() if metrics.enabled else 0
+    # Landmarks and locations both give a lower bound on the distance left
+    estimator = landmarks if landmarks is not None else locations
+
+    if bidirectional:
+        if a_star_heuristics is not None:
+            raise ValueError("Bidirectional search needs landmarks or locations to estimate distances from the start")
+        path, distance, expanded, pushes = _bidirectional_search(
+            graph, reverse_graph if reverse_graph is not None else graph, start, end, estimator)
+        if metrics.enabled:
+            metrics.count("route_search.bidirectional_calls")
+            _record_route_search(expanded, pushes, start_time)
+        return path, distance
+
     queue = [(0, 0, start)]
     distances = {node: float('inf') for node in graph}
     distances[start] = 0
     previous_nodes = {node: None for node in graph}
+    expanded = 0
+    pushes = 1
 
     while queue:
         priority, current_distance, current_node = heapq.heappop(queue)
@@ -163,6 +601,7 @@ def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_
         # If a shorter path to the current node has been found, skip this one
         if current_distance > distances[current_node]:
             continue
+        expanded += 1
 
         # Explore neighbors
         for neighbor, weight in graph[current_node].items():
@@ -172,8 +611,12 @@ def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_
             if distance < distances[neighbor]:
                 distances[neighbor] = distance
                 previous_nodes[neighbor] = current_node
-                priority = distance + (heuristic(neighbor, end, a_star_heuristics) if a_star_heuristics is not None else 0)
+                if estimator is not None:
+                    priority = distance + estimator.estimate(neighbor, end)
+                else:
+                    priority = distance + (heuristic(neighbor, end, a_star_heuristics) if a_star_heuristics is not None else 0)
                 heapq.heappush(queue, (priority, distance, neighbor))
+                pushes += 1
 
     # Reconstruct the shortest path
     path = []
@@ -184,4 +627,15 @@ def route_search(graph: Dict[str, Dict[str, int]], start: str, end: str, a_star_
     if path:
         path.insert(0, current_node)
 
+    if metrics.enabled:
+        _record_route_search(expanded, pushes, start_time)
+
     return path, distances[end]
+
+
+def _record_route_search(expanded: int, pushes: int, start_time: float) -> None:
+    metrics.count("route_search.calls")
+    metrics.count("route_search.nodes_expanded", expanded)
+    metrics.observe("route_search.nodes_expanded", expanded)
+    metrics.observe("route_search.seconds", time.perf_counter() - start_time)
+    metrics.count("route_search.heap_pushes", pushes)
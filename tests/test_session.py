@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_structures_project.base import Address
+from data_structures_project.main import Session
+
+CSV_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "csv")
+
+
+class SessionTestCase(unittest.TestCase):
+    """
+    Runs each test in a copy of the sample CSV files, as Session reads and writes csv/ in the working directory
+    """
+
+    def setUp(self) -> None:
+        self.working_directory = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        shutil.copytree(CSV_DIRECTORY, os.path.join(self.directory, "csv"))
+        os.chdir(self.directory)
+
+    def tearDown(self) -> None:
+        os.chdir(self.working_directory)
+        shutil.rmtree(self.directory)
+
+
+class TestJournalledPlaces(SessionTestCase):
+    def test_enquiries_at_journalled_place_survive_reload(self) -> None:
+        session = Session()
+        place = session.create_place("Fresh Inn", "Hotel", Address("1", "High Street", "AB1 2CD"), 5)
+        session.enquire(place, "Is there parking?")
+
+        reloaded = Session()
+        enquiries = [(place.name, str(enquiry)) for place, enquiry in reloaded.oldest_enquiries()]
+        self.assertIn(("Fresh Inn", "Is there parking?"), enquiries)
+
+        # Compacting must keep the enquiry on disk
+        reloaded.enquiry_log.rewrite(reloaded.places)
+        enquiries = [(place.name, str(enquiry)) for place, enquiry in Session().oldest_enquiries()]
+        self.assertIn(("Fresh Inn", "Is there parking?"), enquiries)
+
+
+if __name__ == "__main__":
+    unittest.main()